@@ -0,0 +1,295 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Benchmarks of the generation pipeline, stage by stage and end to end, on   #
+# synthetic inventories. Usage, from the repository root:                    #
+#   python benchmarks/bench.py -o results.json [--baseline previous.json]    #
+##############################################################################
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import multiprocessing
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)            # the generator modules live at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)                      # pdf.py loads its assets relative to the repository root
+
+import qrcode
+import textlayout
+from qrraster import renderRoundedQR
+from reportlab.pdfgen import canvas
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles.colormasks import SolidFillColorMask
+from qrcode.image.styles.moduledrawers.pil import RoundedModuleDrawer
+from pdf import (PRINT_DPI, QR_STYLE, QR_BACK_COLOR, QR_FRONT_COLOR, URL_PREFIX, ProgressCallback, RenderOptions, buildUrls, buildInfoLines,
+                 renderQRCodes, drawSticker, registerFonts, shutdownRenderPool)
+from generation import GenerationConfig, process_csv, generate
+from synth import CARDINALITIES, datasetPath
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+FORMATS = ["3483", "3424", "3661"]
+CAPTION = "Signaler un problème en scannant le QR code avec votre téléphone HRC."
+
+
+def peakRssMB() -> float | None:
+    """Peak resident set size of the calling process in MB, None where it can't be measured."""
+    try:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024    # bytes on macOS, kB on Linux
+    except ImportError:                 # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except ImportError:
+            return None
+
+
+def qrCodes(count: int):
+    """`count` QRCode objects of distinct URLs, data added but not encoded yet."""
+    codes = []
+    for i in range(count):
+        qr = qrcode.QRCode(error_correction=QR_STYLE["error_correction"], box_size=QR_STYLE["box_size"], border=QR_STYLE["border"])
+        qr.add_data(f"{URL_PREFIX}Cat%C3%A9gorie=Cat%C3%A9gorie+{i % 60:02d}&Mod%C3%A8le=HP+Mod%C3%A8le+{i:04d}&Code+mat%C3%A9riel={100000 + i}"
+                    f"&Num%C3%A9ro+de+S%C3%A9rie=SN{i:08d}")
+        codes.append(qr)
+    return codes
+
+
+# Stages: (csv path, format, options) -> number of rows processed. Heavy per row stages only process a sample of
+# the rows, rows/s are computed on the rows actually processed. Setup is done in `prepare`, out of the timed section.
+# Sampled stages run on their own `--pdf-rows` dataset, every result records the rows it processed and the rows of its
+# dataset: the timings of a sample are not those of the `--sizes` datasets.
+
+def prepareIngest(csvPath, qrFormat, options):
+    return lambda: len(process_csv(csvPath)[0])
+
+
+def prepareUrls(csvPath, qrFormat, options):
+    csv_df = process_csv(csvPath)[0]
+    return lambda: len(buildUrls(csv_df))
+
+
+def prepareEncode(csvPath, qrFormat, options):
+    codes = qrCodes(options["qrSample"])
+    def run():
+        for qr in codes:
+            qr.make(fit=True)
+        return len(codes)
+    return run
+
+
+def prepareRasterize(csvPath, qrFormat, options):
+    codes = qrCodes(options["qrSample"])
+    matrices = [qr.get_matrix() for qr in codes]
+    def run():
+        for matrix in matrices:
+            renderRoundedQR(matrix, QR_STYLE["box_size"], QR_BACK_COLOR, QR_FRONT_COLOR)
+        return len(matrices)
+    return run
+
+
+def prepareRasterizeStyled(csvPath, qrFormat, options):
+    """Reference rasterizer replaced by `renderRoundedQR`, fails if the two don't produce the same pixels."""
+    codes = qrCodes(options["qrSample"])
+    def styled(qr):
+        return qr.make_image(image_factory=StyledPilImage, module_drawer=RoundedModuleDrawer(), eye_drawer=RoundedModuleDrawer(),
+                             color_mask=SolidFillColorMask(back_color=QR_BACK_COLOR, front_color=QR_FRONT_COLOR)).get_image()
+    for qr in codes:
+        fast = renderRoundedQR(qr.get_matrix(), QR_STYLE["box_size"], QR_BACK_COLOR, QR_FRONT_COLOR)
+        if styled(qr).tobytes() != fast.tobytes():
+            raise Exception("renderRoundedQR differs from StyledPilImage")
+    def run():
+        for qr in codes:
+            styled(qr)
+        return len(codes)
+    return run
+
+
+def prepareText(csvPath, qrFormat, options):
+    csv_df, is_eq_csv, _, _ = process_csv(csvPath)
+    text = GenerationConfig.default().getFormat(qrFormat).sheetFormat.text
+    for cached in (textlayout.fit_text_to_width, textlayout.wrapCaption, textlayout.getOptimalWrapWidthForText):
+        cached.cache_clear()            # cold caches, as in a fresh run
+    textlayout._glyphWidths.clear()
+    registerFonts()
+    def run():
+        for infoLine in buildInfoLines(csv_df, is_eq_csv):
+            wLines = [*textlayout.wrapCaption(CAPTION, text.maxLines), infoLine]
+            textlayout.fit_text_to_width(max(wLines, key=len), "NettoVDR", max_width=text.maxWidth, max_font_size=text.maxFontSize)
+        return csv_df.shape[0]
+    return run
+
+
+def preparePdfWrite(csvPath, qrFormat, options):
+    """Drawing and saving of the PDF alone, QR codes are rendered beforehand."""
+    csv_df, is_eq_csv, _, _ = process_csv(csvPath)
+    csv_df = csv_df.head(options["pdfRows"])
+    sheetFormat = GenerationConfig.default().getFormat(qrFormat).sheetFormat
+    registerFonts()
+    infoLines = buildInfoLines(csv_df, is_eq_csv)
+    codes = list(renderQRCodes(buildUrls(csv_df), RenderOptions(workers=options["workers"], vector=options["vector"], dpi=options["dpi"]),
+                               sheetFormat.qr.size, sheetFormat.qr.embbedLogo))
+    def run():
+        c = canvas.Canvas(os.path.join(options["tmpDir"], sheetFormat.fileName), pagesize=sheetFormat.pageSize)
+        for index, (infoLine, qrCode) in enumerate(zip(infoLines, codes)):
+            slot = index % sheetFormat.stickersPerSheet
+            if slot == 0 and index > 0:
+                c.showPage()
+            x, y = sheetFormat.slots[slot]
+            drawSticker(c, sheetFormat, x, y, qrCode, infoLine, CAPTION)
+        c.save()
+        return len(codes)
+    return run
+
+
+def prepareEndToEnd(csvPath, qrFormat, options):
+    """CSV ingest to saved PDFs, every model assigned to `qrFormat`, without QR code cache."""
+    def run():
+        csv_df, is_eq_csv, models, _ = process_csv(csvPath)
+        generationConfig = GenerationConfig.default()
+        generationConfig.getFormat(qrFormat).models.extend(models)
+        generate(generationConfig, csv_df, is_eq_csv, os.path.join(options["tmpDir"], "output"), CAPTION, ProgressCallback(),
+                 RenderOptions(workers=options["workers"], vector=options["vector"], dpi=options["dpi"]))
+        return csv_df.shape[0]
+    return run
+
+
+STAGES = {                  # stage -> (prepare, whether it depends on the sticker format, whether it runs on every dataset size)
+    "ingest": (prepareIngest, False, True),
+    "urls": (prepareUrls, False, True),
+    "encode": (prepareEncode, False, False),
+    "rasterize": (prepareRasterize, False, False),
+    "rasterize-styled": (prepareRasterizeStyled, False, False),
+    "text": (prepareText, True, True),
+    "pdf-write": (preparePdfWrite, True, False),
+    "end-to-end": (prepareEndToEnd, True, False),
+}
+
+
+def _measure(stage: str, csvPath: str | None, qrFormat: str | None, options: dict, conn):
+    """Child process body: prepare, run the stage once, send back the timing and the peak RSS of the process."""
+    try:
+        run = STAGES[stage][0](csvPath, qrFormat, options)
+        start = time.perf_counter()
+        processed = run()
+        seconds = time.perf_counter() - start
+        conn.send({ "rows": processed, "seconds": seconds, "peakRssMB": peakRssMB() })
+    except Exception as err:
+        conn.send({ "error": repr(err) })
+    finally:
+        shutdownRenderPool()
+
+
+def measure(stage: str, csvPath: str | None, qrFormat: str | None, options: dict) -> dict:
+    """Run a stage in a fresh process, so every peak RSS and every cold cache is its own."""
+    context = multiprocessing.get_context("spawn")
+    parentConn, childConn = context.Pipe(duplex=False)
+    with tempfile.TemporaryDirectory() as tmpDir:
+        process = context.Process(target=_measure, args=(stage, csvPath, qrFormat, { **options, "tmpDir": tmpDir }, childConn))
+        process.start()
+        result = parentConn.recv()
+        process.join()
+
+    if "error" not in result:
+        result["rowsPerSecond"] = result["rows"] / result["seconds"] if result["seconds"] > 0 else None
+    return result
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return { "date": datetime.now().isoformat(timespec="seconds"), "commit": commit, "python": platform.python_version(),
+             "platform": platform.platform(), "cpus": os.cpu_count() }
+
+
+def plannedRuns(args: argparse.Namespace) -> list[tuple[str, str, str | None, int, str | None]]:
+    """(stage, dataset kind, cardinality profile, rows, format) of every measurement, `synthetic` datasets are generated URLs."""
+    runs = []
+    for stage in args.stages:
+        _, perFormat, everySize = STAGES[stage]
+        if stage in ("encode", "rasterize", "rasterize-styled"):
+            datasets = [("synthetic", None, args.qr_sample)]
+        elif everySize:
+            datasets = [("eq", profile, rows) for profile in CARDINALITIES for rows in args.sizes] + [("room", None, rows) for rows in args.sizes]
+        else:                                   # sampled stages don't depend on the cardinality
+            datasets = [("eq", next(iter(CARDINALITIES)), args.pdf_rows), ("room", None, args.pdf_rows)]
+
+        for kind, profile, rows in datasets:
+            for qrFormat in (args.formats if perFormat else [None]):
+                runs.append((stage, kind, profile, rows, qrFormat))
+    return runs
+
+
+def compare(results: list[dict], baselinePath: str):
+    """Print the speedup of every measurement over the same measurement of `baselinePath` to stderr."""
+    with open(baselinePath, encoding="utf-8") as f:
+        baseline = { _key(r): r for r in json.load(f)["results"] }
+
+    print(f"{'mesure':<55} {'rows':>8} {'base rows/s':>12} {'rows/s':>12} {'speedup':>8}", file=sys.stderr)
+    for result in results:
+        before = baseline.get(_key(result))
+        if before is None or not before.get("rowsPerSecond") or not result.get("rowsPerSecond") or before.get("rows") != result["rows"]:
+            continue                            # rows/s of different sample sizes aren't comparable
+        print(f"{_key(result):<55} {result['rows']:>8} {before['rowsPerSecond']:>12.1f} {result['rowsPerSecond']:>12.1f} "
+              f"{result['rowsPerSecond'] / before['rowsPerSecond']:>7.2f}x", file=sys.stderr)
+
+
+def _key(result: dict) -> str:
+    return "/".join(str(result[k]) for k in ("stage", "dataset", "format") if result.get(k) is not None)
+
+
+def parseArgs(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline de génération sur des inventaires synthétiques.")
+    parser.add_argument("-o", "--output", default=None, help="fichier JSON des résultats, défaut : sortie standard.")
+    parser.add_argument("--baseline", default=None, help="résultats JSON d'une exécution précédente à comparer.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="nombres de lignes des CSVs synthétiques.")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES), help="étapes mesurées.")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS, help="formats mesurés.")
+    parser.add_argument("--qr-sample", type=int, default=100, help="QR codes encodés et rastérisés par mesure. Défaut : 100.")
+    parser.add_argument("--pdf-rows", type=int, default=200, help="lignes du jeu de données des mesures pdf-write et end-to-end, "
+                        "qui ne tournent pas sur les jeux de --sizes. Défaut : 200.")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="processus de rendu des QR codes. Défaut : 1, reproductible.")
+    parser.add_argument("--vector", action="store_true", help="QR codes vectoriels pour pdf-write et end-to-end.")
+    parser.add_argument("--dpi", type=int, default=PRINT_DPI, help=f"résolution d'impression des QR codes de pdf-write et end-to-end, "
+                        f"0 pour des images RGB lissées. Défaut : {PRINT_DPI}.")
+    parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"), help="dossier des CSVs synthétiques (réutilisés).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parseArgs(argv)
+    options = { "qrSample": args.qr_sample, "pdfRows": args.pdf_rows, "workers": args.workers, "vector": args.vector, "dpi": args.dpi or None }
+
+    results = []
+    for stage, kind, profile, rows, qrFormat in plannedRuns(args):
+        dataset = f"{kind}-{profile}-{rows}" if profile else f"{kind}-{rows}"
+        csvPath = datasetPath(args.data_dir, kind, rows, profile) if kind != "synthetic" else None
+        result = { "stage": stage, "dataset": dataset, "datasetRows": rows, "format": qrFormat, **measure(stage, csvPath, qrFormat, options) }
+        results.append(result)
+        print(f"{_key(result):<55} " + (f"{result['rows']:>8} rows {result['seconds']:>9.3f} s {result['rowsPerSecond']:>12.1f} rows/s  "
+                                        f"{result['peakRssMB'] or 0:>7.1f} MB" if "error" not in result else result["error"]), file=sys.stderr)
+
+    report = { "environment": environment(), "options": options, "results": results }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        compare(results, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,57 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Checks that both CSV engines of read_and_validate_csv give identical       #
+# frames, values kept verbatim. Usage, from the repo root:                   #
+#   python benchmarks/csvengines.py [extra.csv ...]                          #
+##############################################################################
+import os
+import sys
+import tempfile
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generation import read_and_validate_csv
+
+
+# Values a type inferring parser would change: leading and trailing zeros, exponents, "NA", booleans, quoted numbers.
+EQUIPMENTS = """﻿Numéro de Série;Code matériel;Modèle;Catégorie;Commentaire
+007;1.10;M1;C1;x
+0012;2.50;M1;C1;
+NA;3e5;M2;C2;y
+"000";"0.0";true;01;z
+-0;1.;M2;C2;
+"""
+ROOMS = """Numéro de Signalétique;Localisation
+0100;1.20
+NaN;007
+"""
+
+
+def check(path: str) -> bool:
+    """Read `path` with both engines, print and return whether the frames (values, dtypes, columns and index) are identical."""
+    c, pyarrow = read_and_validate_csv(path, "c")[0], read_and_validate_csv(path, "pyarrow")[0]
+    same = c.equals(pyarrow) and c.dtypes.equals(pyarrow.dtypes) and c.columns.equals(pyarrow.columns) and c.index.equals(pyarrow.index)
+    print(f"{'ok' if same else 'DIFFERENT'}  {path}")
+    if not same:
+        print(c.head(10).to_string(), pyarrow.head(10).to_string(), sep="\n\n")
+    return same
+
+
+def main():
+    if importlib.util.find_spec("pyarrow") is None:
+        print("pyarrow n'est pas installé, un seul moteur disponible.")
+        return
+    with tempfile.TemporaryDirectory() as tmpDir:
+        paths = []
+        for name, content in (("equipments.csv", EQUIPMENTS), ("rooms.csv", ROOMS)):
+            paths.append(os.path.join(tmpDir, name))
+            with open(paths[-1], "w", encoding="utf-8") as file:
+                file.write(content)
+        results = [check(path) for path in paths + sys.argv[1:]]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Cold start benchmark of the GUI: time to first window and to the end of    #
+# the background warm up, in fresh interpreters. Usage, from the repo root:  #
+#   python benchmarks/startup.py [-n 5] [-o startup.json]                    #
+##############################################################################
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Run in a fresh interpreter: time from the first statement to the first shown window, then to the end of the warm up thread.
+PROBE = """
+import time
+started = time.perf_counter()
+import os, sys, json
+sys.path.insert(0, os.getcwd())
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
+import main
+
+app = QApplication(sys.argv)
+window = main.MainWindow()
+window.show()
+result = {}
+
+def shown():
+    result["firstWindowSeconds"] = time.perf_counter() - started
+    result["modulesAtFirstWindow"] = sorted(m for m in ("pandas", "reportlab", "qrcode", "pdf", "generation") if m in sys.modules)
+
+def warmedUp():
+    result["warmUpSeconds"] = time.perf_counter() - started
+    print(json.dumps(result))
+    app.quit()
+
+QTimer.singleShot(0, shown)                         # first iteration of the event loop, the window has been shown
+window.warm_up_thread.finished.connect(warmedUp)
+app.exec()
+"""
+
+
+def measure() -> dict:
+    """One cold start, `processSeconds` includes the interpreter start up."""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    processSeconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise Exception(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"exit code {completed.returncode}")
+    return { **json.loads(completed.stdout.strip().splitlines()[-1]), "processSeconds": processSeconds }
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Temps de démarrage de l'interface (fenêtre affichée, imports en arrière plan terminés).")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="nombre de démarrages mesurés. Défaut : 5.")
+    parser.add_argument("-o", "--output", default=None, help="fichier JSON des résultats, défaut : sortie standard.")
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.runs)]
+    medians = { key: statistics.median(run[key] for run in runs) for key in ("firstWindowSeconds", "warmUpSeconds", "processSeconds") }
+    report = {
+        "environment": { "date": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(), "platform": platform.platform() },
+        "median": medians, "runs": runs
+    }
+    print(f"fenêtre : {medians['firstWindowSeconds']:.3f} s, préchargement : {medians['warmUpSeconds']:.3f} s, "
+          f"processus : {medians['processSeconds']:.3f} s (médianes de {args.runs})", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
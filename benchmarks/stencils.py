@@ -0,0 +1,54 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Checks that QR stencils are drawn one pixel per device pixel: drawn size   #
+# x dpi / 72 equals the stencil width, modules are whole pixels, and the     #
+# stencil fits in its QR region. Usage, from the repo root:                  #
+#   python benchmarks/stencils.py [--dpi 300 600]                            #
+##############################################################################
+import os
+import re
+import sys
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)                      # pdf.py loads its assets relative to the repository root
+
+from reportlab.pdfgen import canvas
+from pdf import PAYLOADS, PRINT_DPI, buildUrls, drawQRStencil, getQRStencilFromUrl, qrErrorCorrection
+from generation import GenerationConfig
+import pandas as pd
+
+
+ROW = pd.DataFrame([{ "Modèle": "HP EliteDesk 800 G6", "Code matériel": "0012345", "Catégorie": "Ordinateur", "Numéro de Série": "CZC1234XYZ" }])
+
+
+def drawnWidth(stencil, size: float) -> float:
+    """Width in points `drawQRStencil` scales `stencil` to, read back from the content stream."""
+    c = canvas.Canvas(os.devnull)
+    drawQRStencil(c, stencil, 0, 0, size)
+    scales = [float(m.group(1)) for line in c._code for m in [re.match(r"([\d.]+) 0 0 [\d.]+ [\d.-]+ [\d.-]+ cm$", line)] if m]
+    return scales[-1]
+
+
+def check(qrFormat, payload: str, dpi: int) -> bool:
+    qr = qrFormat.sheetFormat.qr
+    stencil = getQRStencilFromUrl(buildUrls(ROW, payload)[0], qr.size, dpi, qrErrorCorrection(qr.embbedLogo))
+    drawn = drawnWidth(stencil, qr.size)
+    pixels = drawn * dpi / 72
+    ok = abs(pixels - stencil.width) < 0.01 and stencil.width % stencil.modules == 0 and drawn <= qr.size + 1e-6
+    print(f"{'ok' if ok else 'WRONG'}  {qrFormat.name} {payload:<8} {dpi} dpi: {stencil.modules} modules x {stencil.width // stencil.modules} px "
+          f"= {stencil.width} px, drawn {drawn:.3f} pt = {pixels:.3f} device pixels, region {qr.size:.3f} pt")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie que les QR codes 1 bit sont imprimés à un pixel par point d'imprimante.")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[PRINT_DPI], help=f"résolutions vérifiées. Défaut : {PRINT_DPI}.")
+    args = parser.parse_args()
+    results = [check(qrFormat, payload, dpi) for dpi in args.dpi for qrFormat in GenerationConfig.default().formats.values() for payload in PAYLOADS]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Deterministic synthetic inventories (equipments and meeting rooms CSVs)    #
+# used by the benchmarks, same schema as the exports fed to the generator.   #
+##############################################################################
+import os
+import random
+import string
+
+
+CARDINALITIES = {           # profile -> (number of models, number of categories)
+    "low": (8, 3),          # a single department, a handful of models
+    "high": (1500, 60),     # whole organisation export
+}
+EXTRA_EQ_COLS = ["Localisation", "Responsable", "Date d'acquisition", "Remarque"]     # not used by the generator, real exports have them
+
+
+def _zipfWeights(n: int) -> list[float]:
+    """A few models or categories hold most of the rows, like in real inventories."""
+    return [1 / (rank + 1) for rank in range(n)]
+
+
+def writeEquipmentsCSV(path: str, rows: int, models: int, categories: int, seed: int = 0):
+    """Write an equipments CSV of `rows` rows, `models` and `categories` distinct values, always the same for a given `seed`."""
+    rng = random.Random(seed)
+    modelNames = [f"{rng.choice(['HP', 'Dell', 'Lenovo', 'Cisco', 'Zebra', 'Épson'])} Modèle {i:04d}" for i in range(models)]
+    categoryNames = [f"Catégorie {i:02d}" for i in range(categories)]
+    modelCategory = [rng.choice(categoryNames) for _ in range(models)]      # a model always belongs to the same category
+
+    modelIndices = rng.choices(range(models), weights=_zipfWeights(models), k=rows)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(";".join(["Modèle", "Code matériel", "Catégorie", "Numéro de Série", *EXTRA_EQ_COLS]) + "\n")
+        for i, model in enumerate(modelIndices):
+            serial = "".join(rng.choices(string.ascii_uppercase + string.digits, k=10))
+            f.write(f"{modelNames[model]};{100000 + i};{modelCategory[model]};{serial};Bâtiment {rng.randint(1, 9)};"
+                    f"Utilisateur {rng.randint(1, 5000)};2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d};\n")
+
+
+def writeRoomsCSV(path: str, rows: int, seed: int = 0):
+    """Write a meeting rooms CSV of `rows` rows, always the same for a given `seed`."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Numéro de Signalétique;Localisation\n")
+        for i in range(rows):
+            building, floor = rng.randint(1, 40), rng.randint(0, 12)
+            f.write(f"B{building:02d}-{floor}.{i:06d};Bâtiment {building}, étage {floor}\n")
+
+
+def datasetPath(dataDir: str, kind: str, rows: int, profile: str | None = None) -> str:
+    """Path of a synthetic CSV in `dataDir`, written the first time it is asked for."""
+    name = f"{kind}-{profile}-{rows}.csv" if profile else f"{kind}-{rows}.csv"
+    path = os.path.join(dataDir, name)
+    if not os.path.exists(path):
+        os.makedirs(dataDir, exist_ok=True)
+        tmpPath = path + ".tmp"
+        if kind == "eq":
+            writeEquipmentsCSV(tmpPath, rows, *CARDINALITIES[profile or "low"])
+        else:
+            writeRoomsCSV(tmpPath, rows)
+        os.replace(tmpPath, path)
+    return path
@@ -0,0 +1,152 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Command line entry point to generate QR code stickers without the GUI,     #
+# e.g. on a Linux build box or in a nightly job.                             #
+##############################################################################
+import os
+import sys
+import json
+import argparse
+from generation import DUPLICATES, GenerationConfig, process_csv, generate, getOutputFolderTimeStampName
+from pdf import PAYLOADS, PRINT_DPI, ProgressCallback, RenderOptions
+from qrcache import QRImageCache
+from manifest import Manifest, findPreviousManifest
+from instrumentation import Instrumentation, NO_INSTRUMENTATION, PROFILERS, profiled
+
+
+DEFAULT_CAPTION = "Signaler un problème en scannant le QR code avec votre téléphone HRC."
+
+
+class ConsoleProgress(ProgressCallback):
+    """Prints the progress of every generated PDF to stderr, at most once per `step` percent."""
+    def __init__(self, step: int = 10):
+        self.step = step
+        self.lastPrinted = -step
+
+    def start(self, total: int):
+        self.lastPrinted = -self.step
+        print(f"Génération de {total} QR codes...", file=sys.stderr)
+
+    def advance(self, index: int, total: int, url: str):
+        value = round(100 * index / total)
+        if value - self.lastPrinted >= self.step and value < 100:      # 100% is printed by finish
+            self.lastPrinted = value
+            print(f"  {value}%", file=sys.stderr)
+
+    def finish(self):
+        print("  100%", file=sys.stderr)
+
+    def pdfWritten(self, path: str):
+        print(f"  PDF prêt : {path}", file=sys.stderr)
+
+
+def parseArgs(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Génère les PDFs de QR codes HRC à partir d'un CSV d'inventaire.")
+    parser.add_argument("csv", help="CSV d'inventaire (séparateur ';') d'équipements ou de salles de réunion.")
+    parser.add_argument("-m", "--mapping", help="fichier JSON associant chaque modèle à un format, e.g. {\"Modèle A\": \"3424\"}.")
+    parser.add_argument("-f", "--format", action="append", default=[], metavar="MODELE=FORMAT",
+                        help="associe un modèle à un format, peut être répété, a priorité sur --mapping.")
+    parser.add_argument("-d", "--default-format", default="3483",
+                        help="format utilisé pour les modèles non associés (et les salles de réunion), 'none' pour les ignorer. Défaut : 3483.")
+    parser.add_argument("-c", "--caption", default=DEFAULT_CAPTION, help="texte affiché sous les QR codes.")
+    parser.add_argument("-o", "--output", default=None, help="dossier de sortie, défaut : ./output/<horodatage>/.")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="nombre de processus générant les QR codes. Défaut : nombre de coeurs.")
+    parser.add_argument("--vector", action="store_true", help="dessine les QR codes en vectoriel (modules carrés), nets à toute échelle (agrandissements, autres imprimantes), PDFs les plus légers.")
+    parser.add_argument("--dpi", type=int, default=PRINT_DPI, help=f"résolution de l'imprimante, les QR codes sont rendus en 1 bit à cette "
+                        f"résolution. 0 pour des images RGB lissées de taille fixe. Défaut : {PRINT_DPI}.")
+    parser.add_argument("--payload", choices=PAYLOADS, default="full",
+                        help="contenu des QR codes : full (toutes les colonnes), compact (clés d'une lettre), id (identifiant seul, "
+                             "table de correspondance lookup.csv écrite avec les PDFs). Défaut : full.")
+    parser.add_argument("--shard-sheets", type=int, default=None, metavar="N",
+                        help="découpe chaque PDF en fichiers de N feuilles (e.g. mediumHoriQRs_001.pdf), disponibles dès qu'ils sont complets "
+                             "et mémoire constante quel que soit le nombre de lignes.")
+    parser.add_argument("--cache-dir", default="./cache/qr", help="dossier du cache des QR codes déjà générés. Défaut : ./cache/qr.")
+    parser.add_argument("--cache-size", type=int, default=512, help="taille maximale du cache en Mo. Défaut : 512.")
+    parser.add_argument("--no-cache", action="store_true", help="génère tous les QR codes sans utiliser le cache.")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="ne génère que les lignes nouvelles ou modifiées depuis la dernière génération (voir --previous).")
+    parser.add_argument("--previous", default=None, help="manifeste (ou dossier de sortie) de référence pour --incremental. "
+                        "Défaut : dernière génération du dossier parent de --output.")
+    parser.add_argument("--duplicates", choices=DUPLICATES, default="keep",
+                        help="lignes identiques à une ligne précédente : keep les garde (un seul QR code généré et stocké par PDF pour "
+                             "chaque ligne distincte), drop ne garde que la première. Défaut : keep.")
+    parser.add_argument("--csv-engine", choices=["c", "pyarrow"], default=None,
+                        help="lecteur CSV, les valeurs sont lues telles quelles avec les deux. Défaut : pyarrow s'il est installé, sinon c.")
+    parser.add_argument("--report", action="store_true", help="écrit les temps et compteurs de chaque étape dans run_report.json, avec les PDFs.")
+    parser.add_argument("--profile", choices=PROFILERS, default=None, help="profile la génération, résultat écrit avec les PDFs.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="n'affiche pas la progression.")
+    return parser.parse_args(argv)
+
+
+def buildModelMapping(args: argparse.Namespace) -> dict[str, str]:
+    """Merge the `--mapping` JSON file and the `--format MODELE=FORMAT` arguments into a model to format mapping."""
+    mapping: dict[str, str] = {}
+    if args.mapping:
+        with open(args.mapping, encoding="utf-8") as f:
+            mapping.update(json.load(f))
+
+    for assoc in args.format:
+        model, sep, qrFormat = assoc.rpartition("=")
+        if not sep:
+            raise Exception(f"Association '{assoc}' non valide, utilisez MODELE=FORMAT.")
+        mapping[model] = qrFormat
+    return mapping
+
+
+def main(argv: list[str]) -> int:
+    args = parseArgs(argv)
+    if args.shard_sheets is not None and args.shard_sheets < 1:
+        print("Erreur : --shard-sheets doit être au moins 1.", file=sys.stderr)
+        return 1
+    output_path = args.output or f"./output/{getOutputFolderTimeStampName()}/"
+    instrumentation = Instrumentation() if args.report else NO_INSTRUMENTATION
+    try:
+        with profiled(args.profile, output_path):
+            generateFromArgs(args, output_path, instrumentation)
+    except Exception as err:
+        print(f"Erreur : {str(err)}", file=sys.stderr)
+        return 1
+
+    print(output_path)
+    return 0
+
+
+def generateFromArgs(args: argparse.Namespace, output_path: str, instrumentation: Instrumentation):
+    """Read the CSV, associate models to formats following the arguments and generate the PDFs in `output_path`."""
+    with instrumentation.stage("csv.read"):
+        csv_df, is_eq_csv, unique_models, duplicates = process_csv(args.csv, args.csv_engine, args.duplicates)
+    if duplicates:
+        print(duplicates.report(), file=sys.stderr)
+    mapping = buildModelMapping(args)
+
+    generationConfig = GenerationConfig.default()
+    for model in unique_models:
+        qrFormat = mapping.get(model, args.default_format)      # meeting rooms CSVs only contain the MEETING_ROOM_MODEL pseudo model
+        if qrFormat.lower() == "none":
+            print(f"Modèle '{model}' ignoré, aucun format associé.", file=sys.stderr)
+            continue
+        generationConfig.getFormat(qrFormat).models.append(model)
+
+    cache = None if args.no_cache else QRImageCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    
+    previous = None
+    if args.incremental:
+        previousPath = args.previous or findPreviousManifest(os.path.dirname(os.path.normpath(output_path)), exclude=output_path)
+        if previousPath is None:
+            print("Aucune génération précédente, toutes les lignes sont générées.", file=sys.stderr)
+        else:
+            previous = Manifest.load(previousPath)
+    
+    manifest = generate(generationConfig, csv_df, is_eq_csv, output_path, args.caption, ProgressCallback() if args.quiet else ConsoleProgress(),
+                        RenderOptions(workers=args.workers, cache=cache, vector=args.vector, instrumentation=instrumentation,
+                                      shardSheets=args.shard_sheets, payload=args.payload,
+                                      dpi=args.dpi or None), previous)
+    
+    if not args.quiet:
+        print(manifest.report(), file=sys.stderr)
+        if cache is not None:
+            print(cache.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
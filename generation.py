@@ -0,0 +1,450 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Qt free generation core: CSV validation, QR code formats and the loop      #
+# dispatching rows to the PDF generators. Shared by main.py and cli.py.      #
+##############################################################################
+import os
+import time
+import queue
+import importlib.util
+import multiprocessing
+import pandas as pd
+from datetime import datetime
+from collections import Counter
+from concurrent.futures import Future, wait
+from layout import SheetFormat
+from progress import GenerationCancelled
+from pdf import AVERY_ZWECKFORM_3483, AVERY_ZWECKFORM_3424, AVERY_ZWECKFORM_3661, ProgressCallback, RenderOptions, genPDFsWithSheetFormat, buildUrls, qrVersionCounts, qrErrorCorrection, getRenderPool
+from manifest import Manifest, rowKeys, urlHashes
+from instrumentation import Instrumentation, NO_INSTRUMENTATION
+
+
+EQ_MAND_COLS = ["Modèle", "Code matériel", "Catégorie", "Numéro de Série"]      # mandatory columns or schema of CSV
+ROOM_MAND_COLS = ["Numéro de Signalétique", "Localisation"]                     # either columns with information about EZV equipments or meeting rooms.
+MEETING_ROOM_MODEL = "Salle de Réunion"                                         # pseudo model (and output folder) used for meeting rooms CSVs.
+PROGRESS_INTERVAL = 0.1                                                         # seconds between two progress reports of a job running in a worker.
+LOOKUP_FILE = "lookup.csv"                                                      # asset identifier to inventory row, written with the PDFs of "id" payload runs.
+NO_ENTRIES = "Aucun équipement présent dans le fichier."                        # error of an input without rows, CSV or batch of the render service.
+
+
+class InvalidInput(Exception):      # the CSV, rows or options given by the user are not valid, as opposed to a failure of the generation.
+    pass
+
+
+class QRCodeFormat:
+    def __init__(self, description: str, sheetFormat: SheetFormat):
+        self.name = sheetFormat.name                    # short name (Avery Zweckform reference) used on the command line.
+        self.description = description
+        self.sheetFormat: SheetFormat = sheetFormat     # layout of the label sheet, see layout.py
+        self.models: list[str] = []                     # used to filter rows from CSV.
+    
+    def generatePDFs(self, is_eq_csv: bool, entries: pd.DataFrame, progress: ProgressCallback, outputPath: str, qrCaption: str, options: RenderOptions | None = None) -> list[str]:
+        return genPDFsWithSheetFormat(self.sheetFormat, is_eq_csv, entries, progress, outputPath, qrCaption, options)
+
+
+class GenerationConfig:
+    def __init__(self, qrFormats: list[QRCodeFormat]):
+        self.formats: dict[str, QRCodeFormat] = {}      # mapping from format description string to QRCodeFormat.
+        for qrFormat in qrFormats:
+            self.formats[qrFormat.description] = qrFormat
+
+    @staticmethod
+    def default():
+        return GenerationConfig([       # Hardcoded QR code formats and their respective sheet layout, add new formats here (layout declared in pdf.py).
+            QRCodeFormat("Grand Vertical (largeur, hauteur) = (10.4 cm, 14.7 cm)", AVERY_ZWECKFORM_3483),
+            QRCodeFormat("Moyen Horizontal (largeur, hauteur) = (10.4 cm, 4.8 cm)", AVERY_ZWECKFORM_3424),
+            QRCodeFormat("Petit Carré (largeur, hauteur) = (6.9 cm, 6.7 cm)", AVERY_ZWECKFORM_3661)
+        ])
+
+    def getFormatsStrings(self) -> list[str]:
+        return list(self.formats.keys())
+
+    def getFormat(self, nameOrDescription: str) -> QRCodeFormat:
+        """Retrieve a format either by its short name (e.g. `3424`) or by its full description string."""
+        if nameOrDescription in self.formats:
+            return self.formats[nameOrDescription]
+
+        for qrFormat in self.formats.values():
+            if qrFormat.name == nameOrDescription:
+                return qrFormat
+
+        raise InvalidInput(f"Format de QR code inconnu '{nameOrDescription}'. Formats disponibles : {[f.name for f in self.formats.values()]}.")
+
+
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"       # multithreaded pyarrow parser when installed, see `_read_csv_pyarrow`.
+CATEGORY_COLS = {"Modèle", "Catégorie"}                                         # few distinct values: stored once, rows hold small integer codes.
+MAX_REPORTED_ROWS = 10                                                          # row numbers listed per column in validation errors.
+DUPLICATES = ["keep", "drop"]                                                   # what to do with rows repeating an earlier row, see DuplicateReport.
+
+
+def blank_mask(col: pd.Series) -> pd.Series:
+    """True for the missing or whitespace only cells of `col`, for categoricals only the distinct values are stripped."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        categories = col.cat.categories
+        return col.isna() | col.isin(categories[categories.str.strip() == ""])
+    return col.isna() | col.str.strip().eq("")
+
+
+def csv_kind(columns: set[str]) -> bool:
+    """Whether a CSV with the `columns` header is an equipments CSV (`EQ_MAND_COLS`) or a meeting rooms one (`ROOM_MAND_COLS`), throws if neither."""
+    is_eq_csv = set(EQ_MAND_COLS).issubset(columns)
+    if not (is_eq_csv or set(ROOM_MAND_COLS).issubset(columns)):    # if it's not an equipment csv or we don't have all columns for a room csv
+        raise InvalidInput(f"Format de CSV non valide. Fournissez soit {EQ_MAND_COLS} pour des équipements, soit {ROOM_MAND_COLS} pour des salles de réunion.")
+    return is_eq_csv
+
+
+def _listedRows(rows: list[int]) -> str:
+    """Row numbers of `rows`, the first `MAX_REPORTED_ROWS` only. Rows are numbered from 1, the first row after the header,
+    in the order of the CSV or of the JSON list. Blank lines skipped by the parser aren't counted, and a quoted value may
+    span several lines, so these aren't line numbers of the file."""
+    return "n° " + ", ".join(map(str, rows[:MAX_REPORTED_ROWS])) + (", ..." if len(rows) > MAX_REPORTED_ROWS else "")
+
+
+class DuplicateReport:
+    """
+    Repeated rows of an inventory, as row numbers (see `_listedRows`, 1 is the first row after the header): `repeated` rows are identical to an earlier row
+    (same mandatory columns, hence the same QR code whatever the payload), `reused` rows have the asset identifier of an earlier
+    row (see `manifest.rowKeys`, e.g. a serial number imported twice) with other values, both print the same "id" QR code.
+    `dropped` repeated rows were removed. Duplicates that are kept are rendered once and stored once per PDF, see `pdf.renderQRCodes`.
+    """
+    def __init__(self, repeated: list[int], reused: list[int], dropped: int = 0):
+        self.repeated, self.reused = repeated, reused
+        self.dropped = dropped
+
+    @staticmethod
+    def find(csv_df: pd.DataFrame, is_eq_csv: bool) -> "DuplicateReport":
+        """Duplicates of the validated `csv_df`, the first occurrence of a row is neither repeated nor reused."""
+        repeated = csv_df.duplicated(keep="first")
+        reused = rowKeys(csv_df, is_eq_csv).duplicated(keep="first") & ~repeated
+        return DuplicateReport((csv_df.index[repeated] + 1).tolist(), (csv_df.index[reused] + 1).tolist())
+
+    def drop(self, csv_df: pd.DataFrame) -> pd.DataFrame:
+        """`csv_df` (or rows of it) without the repeated rows, e.g. when they're dropped after having been reported."""
+        return csv_df.drop(index=[row - 1 for row in self.repeated], errors="ignore")
+
+    def __bool__(self) -> bool:
+        return bool(self.repeated or self.reused)
+
+    def report(self) -> str:
+        """Human readable report of the duplicates, empty if there are none."""
+        lines = []
+        if self.repeated:
+            action = "supprimée(s)" if self.dropped else "conservée(s), un seul QR code généré par ligne distincte"
+            lines.append(f"{len(self.repeated)} entrée(s) en double {action}, entrée(s) {_listedRows(self.repeated)}.")
+        if self.reused:
+            lines.append(f"{len(self.reused)} entrée(s) reprennent l'identifiant d'une entrée précédente avec d'autres valeurs, "
+                         f"entrée(s) {_listedRows(self.reused)}.")
+        return "\n".join(lines)
+
+
+def validate_entries(csv_df: pd.DataFrame, is_eq_csv: bool, duplicates: str = "keep") -> tuple[pd.DataFrame, DuplicateReport]:
+    """Mandatory columns of `csv_df` in `EQ_MAND_COLS` or `ROOM_MAND_COLS` order, throws if there are no rows or if some cells
+    are blank, listing the rows holding them (see `_listedRows`). Duplicated rows are reported and, if `duplicates` is "drop", only 
+    their first occurrence is kept, see `DuplicateReport`."""
+    if duplicates not in DUPLICATES:
+        raise InvalidInput(f"Traitement des doublons inconnu '{duplicates}'. Traitements disponibles : {DUPLICATES}.")
+    mand_cols = EQ_MAND_COLS if is_eq_csv else ROOM_MAND_COLS
+    csv_df = csv_df[mand_cols]                                      # usecols keeps the file order, URLs are built in mand_cols order.
+
+    if csv_df.shape[0] == 0:
+        raise InvalidInput(NO_ENTRIES)
+
+    blanks = pd.DataFrame({ col: blank_mask(csv_df[col]) for col in mand_cols })   # single pass over the cells
+    if blanks.to_numpy().any():
+        errors = []
+        for col in mand_cols:
+            rows = (blanks.index[blanks[col]] + 1).tolist()         # index 0 is row 1, the first after the header
+            if rows:
+                errors.append(f"Colonne '{col}' contient {len(rows)} valeur(s) vide(s), entrée(s) {_listedRows(rows)}.")
+        raise InvalidInput("Format de CSV non valide. " + " ".join(errors))
+
+    report = DuplicateReport.find(csv_df, is_eq_csv)
+    if duplicates == "drop" and report.repeated:
+        csv_df = report.drop(csv_df)
+        report.dropped = len(report.repeated)
+    return csv_df, report
+
+
+def _read_csv_pyarrow(file_path: str, columns: list[str]) -> pd.DataFrame:
+    """Read `columns` of the CSV at `file_path` with pyarrow, as strings. Unlike `pd.read_csv(engine="pyarrow")`, which infers
+    the types before applying `dtype` ("007" -> "7", "1.10" -> "1.1"), values are kept verbatim, same frame as the c engine."""
+    from pyarrow import csv, string
+    table = csv.read_csv(file_path, parse_options=csv.ParseOptions(delimiter=";"),
+                         convert_options=csv.ConvertOptions(include_columns=columns, column_types={col: string() for col in columns},
+                                                            null_values=[""], strings_can_be_null=True))
+    return table.to_pandas()
+
+
+def read_and_validate_csv(file_path: str, engine: str | None = None, duplicates: str = "keep") -> tuple[pd.DataFrame, bool, DuplicateReport]:
+    """Read and validate CSV file. Expects a non empty utf-8 file containing either `EQ_MAND_COLS` or `ROOM_MAND_COLS`.
+    Equipments: `Numéro de Série, Code matériel, Modèle, Catégorie`, Meeting rooms: `Numéro de Signalétique, Localisation`.
+    Only the header is read to detect the kind of CSV, then only the mandatory columns are parsed, as strings (`CATEGORY_COLS` 
+    as categoricals) with `engine`, `CSV_ENGINE` by default. Returns the dataframe in `EQ_MAND_COLS` or `ROOM_MAND_COLS` column 
+    order, whether it is an equipments CSV and its duplicated rows, dropped if `duplicates` is "drop" (see `validate_entries`).
+    Throws if the file isn't valid, listing the rows holding blank cells."""
+    # read and validate it is a CSV
+    header = list(pd.read_csv(file_path, sep=";", index_col=False, nrows=0).columns)  # header only, this can throw, will be caught by caller
+    is_eq_csv = csv_kind(set(header))
+
+    mand_cols = EQ_MAND_COLS if is_eq_csv else ROOM_MAND_COLS
+    dtypes = {col: "category" if col in CATEGORY_COLS else str for col in mand_cols}
+    if (engine or CSV_ENGINE) == "pyarrow":
+        csv_df = _read_csv_pyarrow(file_path, [col for col in header if col in mand_cols]).astype(dtypes)   # file order, as `usecols`
+    else:
+        csv_df: pd.DataFrame = pd.read_csv(file_path, sep=";", engine="c", usecols=mand_cols, dtype=dtypes,
+                                           keep_default_na=False, na_values=[""])   # values are kept verbatim: leading zeros, "NA" serial numbers...
+    csv_df, duplicateReport = validate_entries(csv_df, is_eq_csv, duplicates)
+    return csv_df, is_eq_csv, duplicateReport
+
+
+def process_csv(file_path: str, engine: str | None = None, duplicates: str = "keep") -> tuple[pd.DataFrame, bool, list[str], DuplicateReport]:
+    """Read and validate the CSV file at `file_path` (see `read_and_validate_csv`), sort equipments by model. Returns the dataframe,
+    whether it's an equipments CSV, the sorted list of unique models and the duplicated rows. Throws if the file isn't valid."""
+    csv_df, is_eq_csv, duplicateReport = read_and_validate_csv(file_path, engine, duplicates)
+
+    if is_eq_csv:
+        csv_df = csv_df.sort_values("Modèle", kind="stable")       # categories are sorted, this sorts the integer codes.
+        unique_models: list[str] = sorted(csv_df["Modèle"].unique().tolist())   # retrieve list of equipment models.
+    else:
+        unique_models = [MEETING_ROOM_MODEL]
+
+    return csv_df, is_eq_csv, unique_models, duplicateReport
+
+
+def getOutputFolderTimeStampName() -> str:
+    folder = str(datetime.now()).replace(":", "").replace(" ", "-")
+    return folder[:folder.find(".")]
+
+
+class GenerationJob:        # one PDF: the rows of a category (or the meeting rooms) generated with a format, independent of every other job.
+    def __init__(self, qrFormat: QRCodeFormat, category: str, entries: pd.DataFrame, outputPath: str):
+        self.qrFormat, self.category = qrFormat, category
+        self.entries = entries
+        self.outputPath = outputPath                    # folder of the PDF, output_path/category
+
+
+def planJobs(generationConfig: GenerationConfig, csv_df: pd.DataFrame, is_eq_csv: bool, output_path: str) -> list[GenerationJob]:
+    """
+    Jobs of a run, largest first. For equipments CSVs, rows are filtered by the models associated to each format, one job per 
+    category. For meeting rooms CSVs, a single job with the format the `MEETING_ROOM_MODEL` pseudo model is associated to.
+    """
+    jobs: list[GenerationJob] = []
+    if is_eq_csv:                                                   # if we're dealing with equipments list (no model column)
+        for qrFormat in generationConfig.formats.values():          # filter to only rows matching the selected models for this format
+            rowsWFormat = csv_df[csv_df['Modèle'].isin(qrFormat.models)]
+
+            for category in set(rowsWFormat['Catégorie'].to_list()):   # for every category, we have a folder in output
+                rowsWFormatAndCategory = rowsWFormat[rowsWFormat['Catégorie'] == category]  # select all equipments with current format of that category, save pdfs in ./output/category/format.pdf
+                jobs.append(GenerationJob(qrFormat, category, rowsWFormatAndCategory, os.path.join(output_path, category)))
+    else:
+        qrFormat = next((f for f in generationConfig.formats.values() if MEETING_ROOM_MODEL in f.models), None)  # retrieve the selected qr format for meeting rooms csv (only one model)
+        if qrFormat is not None and csv_df.shape[0] > 0:            # None: meeting rooms were removed from the selection, nothing to generate.
+            jobs.append(GenerationJob(qrFormat, MEETING_ROOM_MODEL, csv_df, os.path.join(output_path, MEETING_ROOM_MODEL)))
+
+    jobs.sort(key=lambda job: job.entries.shape[0], reverse=True)  # longest processing time first, keeps the workers busy until the end
+    return jobs
+
+
+def previewSheets(generationConfig: GenerationConfig, csv_df: pd.DataFrame, is_eq_csv: bool) -> list[tuple[QRCodeFormat, pd.DataFrame]]:
+    """Rows of the first sheet of every format models are associated to (see `planJobs`), in the order of `generationConfig`."""
+    sheets = []
+    for qrFormat in generationConfig.formats.values():
+        if is_eq_csv:
+            rows = csv_df[csv_df["Modèle"].isin(qrFormat.models)]
+        else:
+            rows = csv_df if MEETING_ROOM_MODEL in qrFormat.models else csv_df.iloc[:0]
+        if rows.shape[0] > 0:
+            sheets.append((qrFormat, rows.iloc[:qrFormat.sheetFormat.stickersPerSheet]))
+    return sheets
+
+
+class _OverallProgress(ProgressCallback):
+    """Folds the progress of the successive PDFs of a run into one overall progress of `total` rows, reported to `progress`."""
+    def __init__(self, progress: ProgressCallback, total: int):
+        self.progress, self.total = progress, total
+        self.offset = 0                                 # rows of the jobs already done
+
+    def advance(self, index: int, total: int, url: str):
+        self.progress.advance(self.offset + index, self.total, url)
+
+    def pdfWritten(self, path: str):
+        self.progress.pdfWritten(path)
+
+
+class _QueueProgress(ProgressCallback):
+    """
+    Progress of a job running in a worker process, sent to the scheduler through `progressQueue` at most every `PROGRESS_INTERVAL`
+    as (job index, row index, url). Written PDFs are sent as (job index, None, path).
+    """
+    def __init__(self, jobIndex: int, progressQueue, cancelled):
+        self.jobIndex = jobIndex
+        self.progressQueue, self.cancelled = progressQueue, cancelled
+        self.lastSent = 0.0
+
+    def advance(self, index: int, total: int, url: str):
+        now = time.monotonic()
+        if now - self.lastSent >= PROGRESS_INTERVAL:
+            if self.cancelled.is_set():                 # the scheduler stopped the run
+                raise GenerationCancelled()
+            self.lastSent = now
+            self.progressQueue.put((self.jobIndex, index, url))
+
+    def pdfWritten(self, path: str):
+        self.progressQueue.put((self.jobIndex, None, path))      # always sent, the scheduler forwards it right away
+
+
+def _runJob(jobIndex: int, sheetFormat: SheetFormat, category: str, is_eq_csv: bool, entries: pd.DataFrame, outputPath: str, qrCaption: str,
+            options: RenderOptions, progressQueue, cancelled) -> tuple[dict, dict, tuple[int, int, int, int]]:
+    """Worker process body of a job, returns the timers and counters of its instrumentation and the activity of its QR code cache."""
+    cache = options.cache
+    cacheBefore = (cache.hits, cache.misses, cache.evictions, cache.sizeBytes) if cache is not None else (0, 0, 0, 0)
+    
+    os.makedirs(outputPath, exist_ok=True, mode=777)
+    with options.instrumentation.scope(sheetFormat.name, category):
+        genPDFsWithSheetFormat(sheetFormat, is_eq_csv, entries, _QueueProgress(jobIndex, progressQueue, cancelled), outputPath, qrCaption, options)
+    
+    cacheAfter = (cache.hits, cache.misses, cache.evictions, cache.sizeBytes) if cache is not None else (0, 0, 0, 0)
+    return options.instrumentation.timers, options.instrumentation.counters, tuple(a - b for a, b in zip(cacheAfter, cacheBefore))   # type: ignore
+
+
+def _runJobsInPool(jobs: list[GenerationJob], is_eq_csv: bool, qrCaption: str, progress: _OverallProgress, options: RenderOptions,
+                   onJobDone):
+    """
+    Run `jobs` concurrently, one per worker of the render pool, each rendering its QR codes in its own process. Progress of every
+    job is gathered into `progress`, if it raises (e.g. cancelled from the GUI) the running jobs are stopped before re-raising.
+    `onJobDone(job)` is called in the calling process as soon as a job is done.
+    """
+    instrumentation = options.instrumentation
+    jobOptions = RenderOptions(workers=1, cache=options.cache, vector=options.vector,
+                               instrumentation=Instrumentation() if instrumentation.enabled else NO_INSTRUMENTATION, shardSheets=options.shardSheets,
+                               payload=options.payload, dpi=options.dpi)
+    
+    with multiprocessing.Manager() as manager:
+        progressQueue, cancelled = manager.Queue(), manager.Event()
+        pool = getRenderPool(options.workers)
+        futures: dict[Future, int] = {
+            pool.submit(_runJob, i, job.qrFormat.sheetFormat, job.category, is_eq_csv, job.entries, job.outputPath, qrCaption,
+                        jobOptions, progressQueue, cancelled): i for i, job in enumerate(jobs)
+        }
+        
+        done, pending, url = [0] * len(jobs), set(futures), ""
+        try:
+            while pending:
+                finished, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+                for future in finished:
+                    timers, counters, (hits, misses, evictions, sizeBytes) = future.result()    # re-raises the exception of the job
+                    instrumentation.merge(timers, counters)
+                    if options.cache is not None:
+                        options.cache.hits += hits
+                        options.cache.misses += misses
+                        options.cache.evictions += evictions
+                        options.cache.sizeBytes += sizeBytes
+                    
+                    jobIndex = futures[future]
+                    done[jobIndex] = jobs[jobIndex].entries.shape[0]
+                    onJobDone(jobs[jobIndex])
+                
+                while True:
+                    try:
+                        jobIndex, index, message = progressQueue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if index is None:
+                        progress.pdfWritten(message)
+                    else:
+                        done[jobIndex], url = max(done[jobIndex], index), message
+                
+                progress.advance(sum(done), progress.total, url)
+        except BaseException:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+            wait(pending)                               # running jobs stop at their next progress report
+            raise
+
+
+def writeLookupTable(csv_df: pd.DataFrame, keys: pd.Series, output_path: str) -> str:
+    """
+    Write the asset identifier (`keys`, encoded by the "id" payload) and mandatory columns of every row of `csv_df` to 
+    `LOOKUP_FILE` in `output_path`, for the mailer to resolve scanned identifiers. Always the whole inventory, also in 
+    incremental runs, so that the latest table resolves every printed sticker.
+    """
+    os.makedirs(output_path, exist_ok=True)
+    path = os.path.join(output_path, LOOKUP_FILE)
+    csv_df.assign(id=keys)[["id", *csv_df.columns]].to_csv(path, sep=";", index=False)
+    return path
+
+
+def generate(generationConfig: GenerationConfig, csv_df: pd.DataFrame, is_eq_csv: bool, output_path: str, qrCaption: str, progress: ProgressCallback,
+             options: RenderOptions | None = None, previous: Manifest | None = None) -> Manifest:
+    """
+    Generate the PDFs of every format of `generationConfig` in `output_path`, one folder per category for equipments CSVs, a 
+    `Salle de Réunion` folder for meeting rooms CSVs (see `planJobs`). `options` tunes the generators. Jobs larger than a worker's
+    share of the rows are generated one after the other, their QR codes rendered by every worker. The smaller ones are then 
+    generated concurrently, one per worker. `progress` is notified of the overall progress of the run and of every written PDF,
+    PDFs are split in files of `options.shardSheets` sheets if set.
+    If the `previous` manifest is given, only the rows that are new or changed since it was written are generated. With the "id"
+    payload, the lookup table of the asset identifiers is written in `output_path`, see `writeLookupTable`.
+    The manifest of the run is written in `output_path` and returned, with the run report if `options.instrumentation` is enabled.
+    """
+    options = options or RenderOptions()
+    instrumentation = options.instrumentation
+    run = os.path.basename(os.path.normpath(output_path))
+    manifest = Manifest()
+    with instrumentation.stage("manifest.hash"):
+        keys = rowKeys(csv_df, is_eq_csv)
+        urls = pd.Series(buildUrls(csv_df, options.payload), index=csv_df.index)   # same URLs as the generators, mandatory columns in the same order
+        hashes = pd.Series(urlHashes(urls.tolist()), index=csv_df.index)
+    if options.payload == "id":
+        writeLookupTable(csv_df, keys, output_path)
+
+    if previous is not None:
+        with instrumentation.stage("manifest.delta"):
+            if is_eq_csv:
+                modelFormats = { model: f.name for f in generationConfig.formats.values() for model in f.models }
+                formats = csv_df["Modèle"].astype(str).map(modelFormats)
+            else:
+                formats = pd.Series(next((f.name for f in generationConfig.formats.values() if MEETING_ROOM_MODEL in f.models), None), index=csv_df.index)
+            csv_df = csv_df[previous.delta(keys, hashes, formats)]
+
+    def record(job: GenerationJob):
+        manifest.record(job.qrFormat.sheetFormat, run, job.category, keys[job.entries.index], hashes[job.entries.index], options.shardSheets)
+
+    jobs = planJobs(generationConfig, csv_df, is_eq_csv, output_path)
+    with instrumentation.stage("qr.versions"):                     # error correction, hence version, depends on the format
+        versions = Counter()
+        for job in jobs:
+            versions.update(qrVersionCounts(urls[job.entries.index].tolist(), qrErrorCorrection(job.qrFormat.sheetFormat.qr.embbedLogo)))
+        manifest.qrVersions = dict(sorted(versions.items()))
+    total = sum(job.entries.shape[0] for job in jobs)
+    if jobs:
+        overall = _OverallProgress(progress, total)
+        progress.start(total)
+        
+        jobsInPool = len(jobs) > 1 and options.workers > 1
+        share = total / options.workers
+        largeJobs = [job for job in jobs if not jobsInPool or job.entries.shape[0] >= share]
+        smallJobs = [job for job in jobs if job not in largeJobs]
+        if len(smallJobs) == 1:                                     # a single small job, not worth a manager process
+            largeJobs, smallJobs = largeJobs + smallJobs, []
+        
+        for job in largeJobs:                                       # QR codes rendered by the whole pool
+            os.makedirs(job.outputPath, exist_ok=True, mode=777)
+            with instrumentation.scope(job.qrFormat.name, job.category):
+                job.qrFormat.generatePDFs(is_eq_csv, job.entries, overall, job.outputPath, qrCaption, options)
+            overall.offset += job.entries.shape[0]
+            record(job)
+        
+        if smallJobs:                                               # one job per worker
+            _runJobsInPool(smallJobs, is_eq_csv, qrCaption, overall, options, record)
+        progress.finish()
+
+    with instrumentation.stage("manifest.save"):
+        if previous is not None:
+            manifest.merge(previous, keys)
+        os.makedirs(output_path, exist_ok=True)
+        manifest.save(output_path)
+    
+    if instrumentation.enabled:
+        instrumentation.save(output_path)
+    return manifest
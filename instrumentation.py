@@ -0,0 +1,144 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Opt-in timers and counters of the generation stages, per format and per    #
+# category, JSON run report and single run profiling.                        #
+##############################################################################
+import os
+import json
+import time
+from datetime import datetime
+from contextlib import contextmanager, nullcontext
+
+
+REPORT_FILE = "run_report.json"         # written next to the PDFs when instrumentation is enabled.
+PROFILERS = ["cprofile", "pyinstrument"]
+
+_NULL_STAGE = nullcontext()             # reusable, entering it costs a method call
+
+
+class _StageTimer:
+    __slots__ = ("instrumentation", "key", "start")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str):
+        self.instrumentation = instrumentation
+        self.key = (instrumentation.scopeKey, name)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        timer = self.instrumentation.timers.setdefault(self.key, [0.0, 0])
+        timer[0] += time.perf_counter() - self.start
+        timer[1] += 1
+
+
+class Instrumentation:
+    """
+    Cumulative timers (`with instrumentation.stage("text.draw"): ...`) and counters (`instrumentation.count("rows", n)`) of the
+    generation, keyed by the current (format, category) scope. When disabled, `stage` returns a shared no-op context manager and
+    `count` returns immediately, so the timers can stay in the per row loops of the generators.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.scopeKey: tuple[str, str] = ("", "")                   # (format, category) the next measurements are attributed to
+        self.timers: dict[tuple[tuple[str, str], str], list] = {}   # (scope, stage) -> [seconds, calls]
+        self.counters: dict[tuple[tuple[str, str], str], int] = {}  # (scope, counter) -> value
+        self.started = time.perf_counter()
+
+    def stage(self, name: str):
+        return _StageTimer(self, name) if self.enabled else _NULL_STAGE
+
+    def count(self, name: str, value: int = 1):
+        if self.enabled:
+            key = (self.scopeKey, name)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def merge(self, timers: dict, counters: dict):
+        """Add the `timers` and `counters` of another instrumentation, e.g. measured in a worker process."""
+        for key, (seconds, calls) in timers.items():
+            timer = self.timers.setdefault(key, [0.0, 0])
+            timer[0] += seconds
+            timer[1] += calls
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def scope(self, qrFormat: str = "", category: str = ""):
+        """Attribute the measurements of the block to `qrFormat` and `category`."""
+        previous, self.scopeKey = self.scopeKey, (qrFormat, category)
+        try:
+            yield
+        finally:
+            self.scopeKey = previous
+
+    def report(self) -> dict:
+        """Totals per stage and counter, and the same broken down per (format, category) scope."""
+        scopes: dict[tuple[str, str], dict] = {}
+        totals: dict = { "stages": {}, "counters": {} }
+        for (scopeKey, name), (seconds, calls) in sorted(self.timers.items()):
+            scope = scopes.setdefault(scopeKey, { "stages": {}, "counters": {} })
+            scope["stages"][name] = { "seconds": round(seconds, 6), "calls": calls }
+            total = totals["stages"].setdefault(name, { "seconds": 0.0, "calls": 0 })
+            total["seconds"] = round(total["seconds"] + seconds, 6)
+            total["calls"] += calls
+        for (scopeKey, name), value in sorted(self.counters.items()):
+            scopes.setdefault(scopeKey, { "stages": {}, "counters": {} })["counters"][name] = value
+            totals["counters"][name] = totals["counters"].get(name, 0) + value
+
+        return {
+            "date": datetime.now().isoformat(timespec="seconds"), "totalSeconds": round(time.perf_counter() - self.started, 6),
+            "totals": totals,
+            "scopes": [{ "format": qrFormat, "category": category, **scope } for (qrFormat, category), scope in sorted(scopes.items())]
+        }
+
+    def save(self, outputPath: str) -> str:
+        path = os.path.join(outputPath, REPORT_FILE)
+        os.makedirs(outputPath, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+NO_INSTRUMENTATION = Instrumentation(enabled=False)     # default of the generators
+
+
+@contextmanager
+def profiled(profiler: str | None, outputPath: str):
+    """
+    Profile the block with `profiler` ("cprofile" or "pyinstrument", None doesn't profile) and write the result in `outputPath`:
+    `profile.prof` (pstats, e.g. for snakeviz) and `profile.txt` for cProfile, `profile.html` for pyinstrument. Only the calling
+    process is profiled, QR codes rendered by the worker processes appear as time spent waiting on them.
+    """
+    if profiler is None:
+        yield
+        return
+
+    if profiler == "cprofile":
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            os.makedirs(outputPath, exist_ok=True)
+            profile.dump_stats(os.path.join(outputPath, "profile.prof"))
+            with open(os.path.join(outputPath, "profile.txt"), "w", encoding="utf-8") as f:
+                pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(60)
+    elif profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise Exception("pyinstrument n'est pas installé (pip install pyinstrument), utilisez cprofile.")
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            os.makedirs(outputPath, exist_ok=True)
+            with open(os.path.join(outputPath, "profile.html"), "w", encoding="utf-8") as f:
+                f.write(profile.output_html())
+    else:
+        raise Exception(f"Profileur inconnu '{profiler}'. Profileurs disponibles : {PROFILERS}.")
@@ -0,0 +1,56 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Data driven description of label sheets: page size, grid of stickers and  #
+# the regions (logo, QR code, text) of a sticker. Coordinates in points.     #
+##############################################################################
+import os
+
+
+class LogoRegion:           # official HRC logo, bottom left corner relative to the sticker origin.
+    def __init__(self, dx: float, dy: float, width: float, height: float):
+        self.dx, self.dy = dx, dy
+        self.width, self.height = width, height
+
+
+class QRRegion:             # QR code square, bottom left corner relative to the sticker origin.
+    def __init__(self, dx: float, dy: float, size: float, embbedLogo: bool = False):
+        self.dx, self.dy = dx, dy
+        self.size = size
+        self.embbedLogo = embbedLogo                # stamp the simplified HRC logo in the middle of the QR code.
+
+
+class TextRegion:           # caption and info line, centred on dx, first line's baseline at dy relative to the sticker origin.
+    def __init__(self, dx: float, dy: float, maxWidth: float, maxFontSize: float, maxLines: int):
+        self.dx, self.dy = dx, dy
+        self.maxWidth = maxWidth
+        self.maxFontSize = maxFontSize
+        self.maxLines = maxLines                    # max number of lines of the wrapped caption, info line excluded.
+
+
+class SheetFormat:
+    """
+    A label sheet: `columns` x `rows` stickers, the first one with its origin at `origin`, the next ones `pitch` = (dx, dy)
+    to the right and downwards. Stickers are filled row by row, the origin of every slot is computed once, when the format
+    is declared, so generating a sticker is a table lookup.
+    """
+    def __init__(self, name: str, fileName: str, pageSize: tuple[float, float], columns: int, rows: int,
+                 origin: tuple[float, float], pitch: tuple[float, float], qr: QRRegion, text: TextRegion, logo: LogoRegion | None = None):
+        self.name = name                            # Avery Zweckform reference, e.g. 3424.
+        self.fileName = fileName                    # name of the generated PDF in the output folder.
+        self.pageSize = pageSize
+        self.columns, self.rows = columns, rows
+        self.origin, self.pitch = origin, pitch
+        self.qr, self.text, self.logo = qr, text, logo
+
+        self.slots: list[tuple[float, float]] = [   # origin of every sticker of a sheet, in filling order.
+            (origin[0] + col * pitch[0], origin[1] - row * pitch[1]) for row in range(rows) for col in range(columns)
+        ]
+
+    @property
+    def stickersPerSheet(self) -> int:
+        return len(self.slots)
+
+    def shardFileName(self, shard: int) -> str:
+        """Name of the PDF of the `shard`-th (0 based) shard when the output is split, e.g. mediumHoriQRs_001.pdf."""
+        stem, extension = os.path.splitext(self.fileName)
+        return f"{stem}_{shard + 1:03d}{extension}"
@@ -4,44 +4,153 @@
 ##############################################################################
 import ctypes
 import sys, os
-import pandas as pd
-from datetime import datetime
-from collections.abc import Callable
+import time
+import shutil
+import multiprocessing
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QLabel, QComboBox, QFileDialog, QWidget, QScrollArea, QPushButton, QHBoxLayout, QProgressBar, QLineEdit
+    QApplication, QMainWindow, QVBoxLayout, QLabel, QFileDialog, QWidget, QPushButton, QHBoxLayout, QProgressBar, QLineEdit, QCheckBox, QSpinBox, QComboBox
 )
-from PyQt6.QtGui import QIcon, QFontDatabase, QFont
-from PyQt6.QtCore import Qt, QUrl
-from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QDesktopServices
-from pdf import genPDFsWithAveryZweckform3483Format, genPDFsWithAveryZweckform3424Format, genPDFsWithAveryZweckform3661Format, ProgressBarState
+from PyQt6.QtGui import QIcon, QFontDatabase, QFont, QPixmap
+from PyQt6.QtCore import Qt, QUrl, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QDesktopServices, QCloseEvent
+from typing import TYPE_CHECKING
+from progress import ProgressCallback, GenerationCancelled
+from modelselector import ModelSelector
+if TYPE_CHECKING:       # the generation stack (pandas, reportlab, qrcode...) is imported once the window is shown, see WarmUpThread.
+    from pdf import RenderOptions
+    from manifest import Manifest
+    from generation import GenerationConfig
 
 
-ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID('hrc.exploitation-si.genqr')
+if sys.platform == "win32":         # taskbar icon grouping, only exists on Windows.
+    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID('hrc.exploitation-si.genqr')
 
 
-class QRCodeFormat:
-    def __init__(self, description, func: Callable[[bool, pd.DataFrame, ProgressBarState, str, str], None]):
-        self.description = description
-        self.generatePDFsFunc: Callable[[bool, pd.DataFrame, ProgressBarState, str, str], None] = func
-        self.models: list[str] = []                     # used to filter rows from CSV.
+PROGRESS_INTERVAL = 0.1     # seconds between two progress updates sent to the GUI (10 Hz), updating a QLabel per row is measurably slow.
+PREVIEW_DELAY = 300         # milliseconds without edits of the caption or of the formats before the preview is rendered again.
+PREVIEW_WIDTH = 170         # pixels, width of the preview of a sheet.
 
 
-class GenerationConfig:
-    def __init__(self, qrFormats: list[QRCodeFormat]):
-        self.formats: dict[str, QRCodeFormat] = {}      # mapping from format description string to QRCodeFormat.
-        for qrFormat in qrFormats:
-            self.formats[qrFormat.description] = qrFormat
-    
-    @staticmethod
-    def default():
-        return GenerationConfig([       # Hardcoded QR code formats and their respective generation function, add new formats here.
-            QRCodeFormat("Grand Vertical (largeur, hauteur) = (10.4 cm, 14.7 cm)", genPDFsWithAveryZweckform3483Format), 
-            QRCodeFormat("Moyen Horizontal (largeur, hauteur) = (10.4 cm, 4.8 cm)", genPDFsWithAveryZweckform3424Format),
-            QRCodeFormat("Petit Carré (largeur, hauteur) = (6.9 cm, 6.7 cm)", genPDFsWithAveryZweckform3661Format)
-        ])
-    
-    def getFormatsStrings(self) -> list[str]:
-        return list(self.formats.keys())
+class ThreadProgress(ProgressCallback):
+    """Forwards the progress of a `GenerationThread` to the GUI at a bounded rate, stops the generation once cancelled."""
+    def __init__(self, thread: "GenerationThread"):
+        self.thread = thread
+        self.lastEmit = 0.0
+    
+    def start(self, total: int):
+        self.thread.progressChanged.emit(0, "")
+    
+    def advance(self, index: int, total: int, url: str):
+        if self.thread.isInterruptionRequested():       # Cancel button was clicked
+            raise GenerationCancelled()
+        
+        now = time.monotonic()
+        if now - self.lastEmit >= PROGRESS_INTERVAL:
+            self.lastEmit = now
+            self.thread.progressChanged.emit(round(100 * index / total), url)
+    
+    def finish(self):
+        self.thread.progressChanged.emit(100, "")
+    
+    def pdfWritten(self, path: str):
+        self.thread.written.add(os.path.abspath(path))
+        self.thread.pdfWritten.emit(path)
+
+
+class WarmUpThread(QThread):
+    """Imports the generation stack and loads its assets in the background once the window is shown, so that neither the 
+    window nor the first dropped CSV waits for them. A CSV dropped before it's done simply waits for the imports in progress."""
+    def run(self):
+        import generation, manifest, qrcache    # noqa: F401
+        import pdf
+        pdf.getLogo()
+        pdf.registerFonts()
+
+
+class GenerationThread(QThread):
+    """
+    Runs `generate` off the GUI thread. On cancellation, the PDFs already reported as written are kept (they can be printed), 
+    the unfinished ones are removed, see `removeUnfinished`.
+    """
+    progressChanged = pyqtSignal(int, str)      # percentage of the current PDF, URL being processed
+    pdfWritten = pyqtSignal(str)                # path of a complete PDF (or shard), can already be printed
+    succeeded = pyqtSignal()
+    cancelled = pyqtSignal(int)                 # number of complete PDFs kept
+    failed = pyqtSignal(str)                    # error message
+    
+    def __init__(self, generationConfig: "GenerationConfig", csv_df, is_eq_csv: bool, output_path: str, qrCaption: str, options: "RenderOptions",
+                 previous: "Manifest | None" = None, parent=None):
+        super().__init__(parent)
+        self.generationConfig, self.csv_df, self.is_eq_csv = generationConfig, csv_df, is_eq_csv
+        self.output_path, self.qrCaption, self.options = output_path, qrCaption, options
+        self.previous = previous                # manifest of the last run when only new or changed rows are generated
+        self.manifest: "Manifest | None" = None     # manifest of this run, set once it succeeded
+        self.written: set[str] = set()              # absolute paths of the complete PDFs, see `ThreadProgress.pdfWritten`
+    
+    def run(self):
+        from generation import generate
+        try:
+            self.manifest = generate(self.generationConfig, self.csv_df, self.is_eq_csv, self.output_path, self.qrCaption, ThreadProgress(self), self.options, self.previous)
+        except GenerationCancelled:
+            self.removeUnfinished()
+            self.cancelled.emit(len(self.written))
+        except Exception as err:
+            self.failed.emit(str(err))
+        else:
+            self.succeeded.emit()
+    
+    def removeUnfinished(self):
+        """
+        Remove the PDFs of the cancelled run that weren't reported as written, and the folders left empty. Without any complete
+        PDF, the whole output folder is removed (including the lookup table of the "id" payload).
+        """
+        if not self.written:
+            shutil.rmtree(self.output_path, ignore_errors=True)
+            return
+        for folder, _, files in os.walk(self.output_path, topdown=False):
+            for file in files:
+                path = os.path.abspath(os.path.join(folder, file))
+                if file.endswith(".pdf") and path not in self.written:
+                    os.remove(path)
+            if not os.listdir(folder):
+                os.rmdir(folder)
+
+
+class PreviewThread(QThread):
+    """
+    Renders the first sheet of every selected format (see `generation.previewSheets`) to a `PREVIEW_WIDTH` pixels wide image:
+    an in memory PDF drawn by `pdf.genPreviewPDF`, rasterized by QtPdf. Emits the images and the time it took.
+    """
+    rendered = pyqtSignal(list, float)          # [(format description, QImage)], seconds
+    failed = pyqtSignal(str)                    # error message
+    
+    def __init__(self, generationConfig: "GenerationConfig", csv_df, is_eq_csv: bool, qrCaption: str, payload: str, parent=None):
+        super().__init__(parent)
+        self.generationConfig, self.csv_df, self.is_eq_csv = generationConfig, csv_df, is_eq_csv
+        self.qrCaption, self.payload = qrCaption, payload
+    
+    def run(self):
+        from PyQt6.QtPdf import QPdfDocument
+        from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QSize
+        from generation import previewSheets
+        from pdf import genPreviewPDF
+        
+        start = time.perf_counter()
+        try:
+            images = []
+            for qrFormat, entries in previewSheets(self.generationConfig, self.csv_df, self.is_eq_csv):
+                buffer = QBuffer()
+                buffer.setData(QByteArray(genPreviewPDF(qrFormat.sheetFormat, self.is_eq_csv, entries, self.qrCaption, self.payload)))
+                buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+                document = QPdfDocument(None)
+                document.load(buffer)                   # synchronous, the whole PDF is in the buffer
+                width, height = qrFormat.sheetFormat.pageSize
+                images.append((qrFormat.description, document.render(0, QSize(PREVIEW_WIDTH, round(PREVIEW_WIDTH * height / width)))))
+                document.close()
+        except Exception as err:
+            self.failed.emit(str(err))
+        else:
+            self.rendered.emit(images, time.perf_counter() - start)
 
 
 class MainWindow(QMainWindow):
@@ -59,11 +168,12 @@ class MainWindow(QMainWindow):
         self.setStyleSheet("font-size: 14px;")
         
         self.reset()
+        
+        self.warm_up_thread = WarmUpThread(self)
+        QTimer.singleShot(0, self.warm_up_thread.start)             # runs once the event loop has shown the window
     
 
     def reset(self):
-        self.generationConfig: GenerationConfig = GenerationConfig.default()          # configuration of PDF generation, contains PDF function, qr code format and rows associations.
-        
         self.setWindowTitle("Générateur de QR codes — C-Exploitation SI")
         
         self.setGeometry(100, 100, 1200, 600)
@@ -89,23 +199,79 @@ class MainWindow(QMainWindow):
         self.caption_edit_title = QLabel("Texte de QR code")
         self.caption_edit_title.setVisible(False)
         
+        self.vector_checkbox = QCheckBox("QR codes vectoriels (nets à toute échelle)")    # draw QR codes as PDF rectangles instead of images
+        self.vector_checkbox.setVisible(False)
+        
+        self.incremental_checkbox = QCheckBox("Seulement les lignes nouvelles ou modifiées")    # diff against the manifest of the last run
+        self.incremental_checkbox.setVisible(False)
+        
+        self.shard_spinbox = QSpinBox()                     # split the PDFs in files of that many sheets, 0 keeps a single PDF per format
+        self.shard_spinbox.setRange(0, 1000)
+        self.shard_spinbox.setSpecialValueText("Un seul PDF")
+        self.shard_spinbox.setSuffix(" feuilles par PDF")
+        self.shard_spinbox.setVisible(False)
+        
+        self.payload_combo = QComboBox()                    # what the QR codes encode, see pdf.buildUrls
+        self.payload_combo.addItem("Toutes les colonnes", "full")
+        self.payload_combo.addItem("Clés courtes (QR plus petits)", "compact")
+        self.payload_combo.addItem("Identifiant seul + lookup.csv", "id")
+        self.payload_combo.setVisible(False)
+        
+        self.preview_checkbox = QCheckBox("Aperçu")          # live preview of the first sheet of every selected format
+        self.preview_checkbox.setChecked(True)
+        self.preview_checkbox.setVisible(False)
+        
         self.caption_hlayout.addWidget(self.caption_edit_title)
         self.caption_hlayout.addWidget(self.caption_edit_text)
-        self.caption_hlayout.setContentsMargins(0, 0, 700, 0)
+        self.caption_hlayout.addWidget(self.vector_checkbox)
+        self.caption_hlayout.addWidget(self.incremental_checkbox)
+        self.caption_hlayout.addWidget(self.shard_spinbox)
+        self.caption_hlayout.addWidget(self.payload_combo)
+        self.caption_hlayout.addWidget(self.preview_checkbox)
+        self.caption_hlayout.setContentsMargins(0, 0, 100, 0)
         self.layout.addLayout(self.caption_hlayout)
         
-        self.scroll_area = QScrollArea()                            # model list Scrollable area, displays contents of child widget in frame https://doc.qt.io/qt-6/qscrollarea.html#details
-        self.scroll_area.setWidgetResizable(True)                   # if widget exceeds size of frame, view provides scroll bars.
-        self.scroll_content = QWidget()
-        self.scroll_layout = QVBoxLayout(self.scroll_content)       # will contain the model, dropdowns, close triples.
-        self.scroll_area.setWidget(self.scroll_content)             # child widget (that needs scrollbars) is specified here. Scroll area contains the list of dropdowns 
-        self.scroll_area.setVisible(False)
-        self.layout.addWidget(self.scroll_area)                     
+        self.duplicates_hlayout = QHBoxLayout()              # repeated rows of the CSV, only shown if there are any
+        self.duplicates_label = QLabel()
+        self.duplicates_label.setVisible(False)
+        self.duplicates_checkbox = QCheckBox("Supprimer les lignes en double")
+        self.duplicates_checkbox.setVisible(False)
+        self.duplicates_hlayout.addWidget(self.duplicates_label)
+        self.duplicates_hlayout.addStretch()
+        self.duplicates_hlayout.addWidget(self.duplicates_checkbox)
+        self.layout.addLayout(self.duplicates_hlayout)
+        
+        self.model_selector = ModelSelector()                        # table of the models and of their format, see modelselector.py
+        self.model_selector.setVisible(False)
+        
+        self.preview_widget = QWidget()                              # first sheet of every selected format, see PreviewThread
+        self.preview_layout = QVBoxLayout(self.preview_widget)
+        self.preview_layout.setContentsMargins(0, 0, 0, 0)
+        self.preview_title = QLabel("Aperçu de la première feuille")
+        self.preview_images_layout = QHBoxLayout()
+        self.preview_layout.addWidget(self.preview_title)
+        self.preview_layout.addLayout(self.preview_images_layout)
+        self.preview_layout.addStretch()
+        self.preview_widget.setVisible(False)
+        
+        self.content_hlayout = QHBoxLayout()
+        self.content_hlayout.addWidget(self.model_selector, stretch=1)
+        self.content_hlayout.addWidget(self.preview_widget)
+        self.layout.addLayout(self.content_hlayout)
+        
+        self.preview_timer = QTimer(self)                            # restarted by every edit, the preview is rendered once they stop
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY)
+        self.preview_timer.timeout.connect(self.start_preview)
+        self.preview_pending = False                                 # edited while a preview was being rendered
+        self.caption_edit_text.textChanged.connect(self.schedule_preview)
+        self.payload_combo.currentIndexChanged.connect(self.schedule_preview)
+        self.preview_checkbox.toggled.connect(self.schedule_preview)
+        self.duplicates_checkbox.toggled.connect(self.on_duplicates_toggled)
+        self.model_selector.table_model.dataChanged.connect(self.schedule_preview)
+        self.model_selector.table_model.modelReset.connect(self.schedule_preview)
 
         self.setAcceptDrops(True)   # Enable drag-and-drop on whole window, requires registering dropEvent() hook https://doc.qt.io/qt-6/qwidget.html#acceptDrops-prop
-                
-        self.eq_mand_cols = ["Modèle", "Code matériel", "Catégorie", "Numéro de Série"]     # mandatory columns or schema of CSV
-        self.room_mand_cols =  ["Numéro de Signalétique", "Localisation"]                   # either columns with information about EZV equipments or meeting rooms.
         
     
     def open_file_dialog(self, event=None):
@@ -140,11 +306,17 @@ class MainWindow(QMainWindow):
         self.generate_button.setFixedWidth(100)
         self.generate_button.clicked.connect(self.on_generate_clicked)
         
+        self.cancel_button = QPushButton("Annuler")                     # stops the generation thread, enabled while generating.
+        self.cancel_button.setFixedWidth(100)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.on_cancel_clicked)
+        
         self.current_url = QLabel("")                        # label to display current URL being processed.
         self.current_url.setAlignment(Qt.AlignmentFlag.AlignRight)
         
         self.gen_curr_url_layout = QHBoxLayout()
         self.gen_curr_url_layout.addWidget(self.generate_button)
+        self.gen_curr_url_layout.addWidget(self.cancel_button)
         self.gen_curr_url_layout.addWidget(self.current_url)
         
         self.layout.addLayout(self.gen_curr_url_layout)
@@ -156,143 +328,175 @@ class MainWindow(QMainWindow):
         self.layout.addWidget(self.progress)
         
 
-    def read_and_validate_csv(self, file_path):
-        """Read and validate CSV file. Expects a non empty utf-8 file containing either `eq_mand_cols` or `room_mand_cols` defined 
-        in the constructor. Equipments: `Numéro de Série, Code matériel, Modèle, Catégorie`, Meeting rooms: `Numéro de 
-        Signalétique, Localisation`"""
-        # read and validate it is a CSV
-        self.csv_df: pd.DataFrame = pd.read_csv(file_path, sep=";", index_col=False)    # this can throw, will be caught in parent except
-        
-        columns = set(self.csv_df.columns.to_list())                    # check presence of columns
-        self.is_eq_csv = set(self.eq_mand_cols).issubset(columns)
-        
-        if not (self.is_eq_csv or set(self.room_mand_cols).issubset(columns)):  # if it's not an equipment csv or we don't have all columns for a room csv
-            raise Exception(f"Format de CSV non valide. Fournissez soit {self.eq_mand_cols} pour des équipements, soit {self.room_mand_cols} pour des salles de réunion.")
-        
-        mand_cols = self.eq_mand_cols if self.is_eq_csv else self.room_mand_cols
-        for mand_col in mand_cols:
-            if self.col_contains_blanks(self.csv_df[mand_col]):
-                raise Exception(f"Format de CSV non valide. Colonne '{mand_col}' contient des valeurs vides.")
-        
-        if self.csv_df.shape[0] == 0: 
-            raise Exception("Aucun équipement présent dans le fichier.")
-            
-
     def process_csv(self, file_path):
         """Read CSV file at @param file_path, check Modèle and Code Matériel column is provided.
         If 'Numéro de Série' is provided, it'll be used in the encoded URLs, but it's not mandatory.
         Will throw an exception if error is encountered. 
         """
-        self.read_and_validate_csv(file_path)
-        
-        self.unique_models: list[str] = self.csv_df["Modèle"].dropna().unique().tolist() if self.is_eq_csv else ["Salle de Réunion"]  # retrieve list of equipment models.
-        self.unique_models.sort()
-        
-        if self.is_eq_csv:
-            self.csv_df = self.csv_df[self.eq_mand_cols].sort_values("Modèle")    # keep only mandatory columns, sort by model.
-        else: 
-            self.csv_df = self.csv_df[self.room_mand_cols]                        # keep only mandatory columns for meeting rooms.
-        
+        import generation
+        self.generationConfig: "GenerationConfig" = generation.GenerationConfig.default()    # configuration of PDF generation, contains PDF function, qr code format and rows associations.
+        self.csv_df, self.is_eq_csv, self.unique_models, self.duplicates = generation.process_csv(file_path)   # duplicates are dropped on demand, see selectedEntries
         self.populate_model_list()
     
 
     def populate_model_list(self):
-        title_label = QLabel("Veuillez Choisir le format de QR code par Modèle d'Équipement" if self.is_eq_csv else "Choissisez le format de QR code")
-        title_label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)  # Align inside the label
-        title_label.setStyleSheet("font-weight: bold; font-size: 16px;")
-        self.scroll_layout.addWidget(title_label)
-
-        self.scroll_layout.setAlignment(Qt.AlignmentFlag.AlignTop)          # avoids spacing issues when removing models
-
-        # Add models with dropdowns and remove buttons
-        for model in self.unique_models:
-            model_layout = QHBoxLayout()                        # horizontal layout for dropdown, buttons and labels.
-            model_label = QLabel(model.strip())
-            
-            # if it's an equipments csv, count number of instances per model, else if meeting room csv, it's just N°lines.
-            count_label = QLabel("(" + str(self.csv_df["Modèle"].value_counts()[model] 
-                                           if self.is_eq_csv else self.csv_df.shape[0]) + " instances)")
-            
-            dropdown = QComboBox()                               # presents a list of options to the user, selection widget. 
-            dropdown.setFixedWidth(350)
-            dropdown.addItems(self.generationConfig.getFormatsStrings())      # list of descriptive strings.
-
-            remove_button = QPushButton("X")
-            remove_button.setFixedWidth(30)
-            remove_button.clicked.connect(lambda _, m=model, l=model_layout: self.remove_model(m, l))
-
-            model_layout.addWidget(remove_button)
-            model_layout.addWidget(model_label)
-            model_layout.addWidget(count_label)
-            model_layout.addWidget(dropdown)
-            self.scroll_layout.addLayout(model_layout)
-            
+        # if it's an equipments csv, count number of instances per model (once for all models), else if meeting room csv, it's just N°lines.
+        counts = self.csv_df["Modèle"].value_counts().to_dict() if self.is_eq_csv else { model: self.csv_df.shape[0] for model in self.unique_models }
+        self.model_selector.setModels("Veuillez Choisir le format de QR code par Modèle d'Équipement" if self.is_eq_csv else "Choissisez le format de QR code",
+                                      [(model, counts[model]) for model in self.unique_models], self.generationConfig.getFormatsStrings())
+        
         self.drop_label.setVisible(False)
         self.setAcceptDrops(False)
         self.caption_edit_title.setVisible(True)
         self.caption_edit_text.setVisible(True)
-        self.scroll_area.setVisible(True)
-
-
-    def getOutputFolderTimeStampName(self) -> str:
-        folder = str(datetime.now()).replace(":", "").replace(" ", "-")
-        return folder[:folder.find(".")]
+        self.vector_checkbox.setVisible(True)
+        self.incremental_checkbox.setVisible(True)
+        self.shard_spinbox.setVisible(True)
+        self.payload_combo.setVisible(True)
+        self.preview_checkbox.setVisible(True)
+        self.duplicates_label.setText(self.duplicates.report())
+        self.duplicates_label.setVisible(bool(self.duplicates))
+        self.duplicates_checkbox.setVisible(bool(self.duplicates.repeated))
+        self.model_selector.setVisible(True)
+        self.schedule_preview()
 
 
     def on_generate_clicked(self, _):
-        """Read the dropdown values, associate models to QR code formats, call the PDF generation functions."""
-        self.generationConfig: GenerationConfig = GenerationConfig.default()            # reset config back to default
-        output_path = f"./output/{self.getOutputFolderTimeStampName()}/"
+        """Read the dropdown values, associate models to QR code formats, start the PDF generation thread."""
+        from pdf import RenderOptions
+        from qrcache import QRImageCache
+        from manifest import Manifest, findPreviousManifest
+        from generation import getOutputFolderTimeStampName
+        
+        self.generationConfig = self.selectedGenerationConfig()
+        output_path = f"./output/{getOutputFolderTimeStampName()}/"
         qrCaption = self.caption_edit_text.text()
         
-        pgBar = ProgressBarState(self.progress, self.current_url)                 # initialize progress bar state
         self.generate_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
         self.caption_edit_text.setEnabled(False)
-        for i in range(1, self.scroll_layout.count()):
-            self.scroll_layout.itemAt(i).itemAt(3).widget().setEnabled(False)           # type: ignore
-            self.scroll_layout.itemAt(i).itemAt(0).widget().setEnabled(False)           # type: ignore
-        
-        if self.is_eq_csv:                                          # if we're dealing with equipments list (no model column)
-            for i in range(1, self.scroll_layout.count()):
-                qrFormat = self.scroll_layout.itemAt(i).itemAt(3).widget().currentText()    # type: ignore
-                model = self.scroll_layout.itemAt(i).itemAt(1).widget().text()              # type: ignore
-                
-                self.generationConfig.formats[qrFormat].models.append(model)
-                
-            for qrFormat in self.generationConfig.formats:                      # filter to only rows matching the selected models for this format and generate PDFs
-                rowsWFormat = self.csv_df[self.csv_df['Modèle'].isin(self.generationConfig.formats[qrFormat].models)]
-                
-                categories = set(rowsWFormat['Catégorie'].to_list())        # get categories of equipment using said format
-                
-                for category in categories:                                 # for every category, we have a folder in output
-                    
-                    os.makedirs(output_path + category, exist_ok=True, mode=777)
-                    rowsWFormatAndCategory = rowsWFormat[rowsWFormat['Catégorie'] == category]  # select all equipments with current format of that category, save pdfs in ./output/category/format.pdf  
-                    
-                    self.generationConfig.formats[qrFormat].generatePDFsFunc(self.is_eq_csv, rowsWFormatAndCategory, pgBar, output_path + category, qrCaption)    # self.progressBarState initialized in addGenerateButtonAndLoadingBar
-                
-        else:
-            qrFormat = self.scroll_layout.itemAt(1).itemAt(3).widget().currentText()                       # type: ignore retrive the selected qr format for meeting rooms csv (only one model)
-            
-            os.makedirs(output_path + "Salle de Réunion", exist_ok=True, mode=777)
-            self.generationConfig.formats[qrFormat].generatePDFsFunc(self.is_eq_csv, self.csv_df, pgBar, output_path + "Salle de Réunion", qrCaption)   # call generate QR codes for meeting rooms.
+        self.vector_checkbox.setEnabled(False)
+        self.incremental_checkbox.setEnabled(False)
+        self.shard_spinbox.setEnabled(False)
+        self.payload_combo.setEnabled(False)
+        self.preview_checkbox.setEnabled(False)
+        self.duplicates_checkbox.setEnabled(False)
+        self.model_selector.setEnabled(False)
+        
+        self.cache = QRImageCache("./cache/qr")                             # QR codes of unchanged rows are reused from previous runs
+        options = RenderOptions(cache=self.cache, vector=self.vector_checkbox.isChecked(), shardSheets=self.shard_spinbox.value() or None,
+                                payload=self.payload_combo.currentData())
+        
+        previousPath = findPreviousManifest("./output", exclude=output_path) if self.incremental_checkbox.isChecked() else None
+        previous = Manifest.load(previousPath) if previousPath is not None else None    # no previous run: everything is generated
+        
+        self.generation_thread = GenerationThread(self.generationConfig, self.selectedEntries(), self.is_eq_csv, output_path, qrCaption, options, previous, self)
+        self.generation_thread.progressChanged.connect(self.on_generation_progress)
+        self.generation_thread.pdfWritten.connect(lambda path: self.current_url.setText(f"PDF prêt : {path}"))
+        self.generation_thread.succeeded.connect(lambda: self.on_generation_succeeded(output_path))
+        self.generation_thread.cancelled.connect(lambda kept: self.on_generation_stopped(
+            f"Génération annulée, {kept} PDF(s) terminé(s) conservé(s) dans {output_path}" if kept else "Génération annulée."))
+        self.generation_thread.failed.connect(lambda err: self.on_generation_stopped(f"Erreur : {err}"))
+        self.generation_thread.start()
+    
+    
+    def selectedGenerationConfig(self) -> "GenerationConfig":
+        """Default configuration with every model (or the meeting room pseudo model) associated to its selected format."""
+        from generation import GenerationConfig
+        generationConfig = GenerationConfig.default()
+        for model, qrFormat in self.model_selector.mapping().items():
+            generationConfig.formats[qrFormat].models.append(model)
+        return generationConfig
+    
+    
+    def selectedEntries(self):
+        """Rows of the CSV to generate, without the repeated ones if they are to be dropped."""
+        return self.duplicates.drop(self.csv_df) if self.duplicates_checkbox.isChecked() else self.csv_df
+    
+    
+    def on_duplicates_toggled(self, checked: bool):
+        self.duplicates.dropped = len(self.duplicates.repeated) if checked else 0
+        self.duplicates_label.setText(self.duplicates.report())
+        self.schedule_preview()
+    
+    
+    def schedule_preview(self, *_):
+        """(Re)start the debounce timer of the preview, or hide it if it was turned off."""
+        self.preview_widget.setVisible(self.preview_checkbox.isChecked())
+        if self.preview_checkbox.isChecked() and self.model_selector.isVisible():
+            self.preview_timer.start()
+    
+    
+    def start_preview(self):
+        """Render the preview in the background. If one is still being rendered, this one starts once it's done."""
+        if getattr(self, "preview_thread", None) is not None:      # still rendering, cleared once it's finished
+            self.preview_pending = True
+            return
         
+        self.preview_pending = False
+        self.preview_thread = PreviewThread(self.selectedGenerationConfig(), self.selectedEntries(), self.is_eq_csv, self.caption_edit_text.text(),
+                                            self.payload_combo.currentData(), self)
+        self.preview_thread.rendered.connect(self.on_preview_rendered)
+        self.preview_thread.failed.connect(lambda err: self.preview_title.setText(f"Aperçu indisponible : {err}"))
+        self.preview_thread.finished.connect(self.on_preview_finished)
+        self.preview_thread.finished.connect(self.preview_thread.deleteLater)     # one thread per preview, freed once it's done
+        self.preview_thread.start()
+    
+    
+    def on_preview_finished(self):
+        self.preview_thread = None                                      # deleted by its deleteLater
+        if self.preview_pending:
+            self.start_preview()
+    
+    
+    def on_preview_rendered(self, images: list, seconds: float):
+        while self.preview_images_layout.count():
+            self.preview_images_layout.takeAt(0).widget().deleteLater()    # type: ignore only labels in this layout
+        for description, image in images:
+            label = QLabel()
+            label.setPixmap(QPixmap.fromImage(image))
+            label.setToolTip(description)
+            label.setStyleSheet("border: 1px solid #aaa;")
+            self.preview_images_layout.addWidget(label)
+        self.preview_title.setText(f"Aperçu de la première feuille ({1000 * seconds:.0f} ms)")
+    
+    
+    def on_cancel_clicked(self, _):
+        self.cancel_button.setEnabled(False)
+        self.current_url.setText("Annulation...")
+        self.generation_thread.requestInterruption()                    # checked by ThreadProgress before every row
+    
+    
+    def on_generation_progress(self, value: int, url: str):
+        self.progress.setValue(value)
+        self.current_url.setText(url)
+    
+    
+    def on_generation_succeeded(self, output_path: str):
         QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.abspath(output_path)))         # open explorer window at place where PDFs were saved.
+        self.on_generation_stopped(self.generation_thread.manifest.report() + "\n" + self.cache.report())     # type: ignore generated rows, hit/miss report of the last run
+    
+    
+    def on_generation_stopped(self, message: str):
         self.reset()
-                    
-
-    def col_contains_blanks(self, col: pd.Series) -> bool:
-        return col.isna().any() or col.astype(str).str.strip().eq("").any()
+        self.drop_label.setText(self.drop_label.text() + "\n\n" + message)
     
-
-    def remove_model(self, model, layout):
-        """Remove a specific model from the list."""
-        for i in reversed(range(layout.count())):
-            layout.itemAt(i).widget().deleteLater()
-        self.scroll_layout.removeItem(layout)
-
+    
+    def closeEvent(self, event: QCloseEvent):
+        """Closing the window during a generation cancels it and waits for the thread to clean up."""
+        self.warm_up_thread.wait()
+        preview = getattr(self, "preview_thread", None)
+        if preview is not None:
+            preview.wait()
+        thread = getattr(self, "generation_thread", None)
+        if thread is not None and thread.isRunning():
+            thread.requestInterruption()
+            thread.wait()
+        event.accept()
+                    
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()        # QR rendering workers re-launch the frozen executable, let them run their task instead of the GUI.
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,109 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Per run manifest of the generated stickers: which row was printed where,   #
+# used to only regenerate the new or changed rows of an inventory.           #
+##############################################################################
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from layout import SheetFormat
+
+
+MANIFEST_FILE = "manifest.csv"          # written at the root of every output folder.
+MANIFEST_COLS = ["key", "urlHash", "format", "run", "file", "page", "position"]
+
+
+def rowKeys(csv_df: pd.DataFrame, is_eq_csv: bool) -> pd.Series:
+    """Identity of the physical asset of every row: `Numéro de Série|Code matériel` for equipments, `Numéro de Signalétique` for rooms."""
+    if is_eq_csv:
+        return csv_df["Numéro de Série"].astype(str) + "|" + csv_df["Code matériel"].astype(str)
+    return csv_df["Numéro de Signalétique"].astype(str)
+
+
+def urlHashes(urls: list[str]) -> list[str]:
+    """Short digest of every encoded URL, a changed hash means the printed QR code is outdated."""
+    return [hashlib.sha256(url.encode("utf-8")).hexdigest()[:16] for url in urls]
+
+
+class Manifest:
+    """
+    One record per generated sticker: row key, hash of the encoded URL, sheet format, and position of the sticker, output
+    folder (`run`), PDF relative to it, page and position in the page (both from 1). Records of rows that weren't regenerated
+    by an incremental run are carried over from the previous manifest, so it always describes the printed state of the inventory.
+    """
+    def __init__(self, records: pd.DataFrame | None = None):
+        self.records = records if records is not None else pd.DataFrame(columns=MANIFEST_COLS)
+        self.generated = 0                      # stickers generated by this run
+        self.carried = 0                        # records carried over from the previous manifest
+        self.qrVersions: dict[int, int] = {}    # number of generated QR codes of every version, see `pdf.qrVersionCounts`
+        self._new: list[pd.DataFrame] = []
+
+    @staticmethod
+    def load(path: str) -> "Manifest":
+        """Read the manifest at `path`, either a manifest file or an output folder containing one."""
+        if os.path.isdir(path):
+            path = os.path.join(path, MANIFEST_FILE)
+        return Manifest(pd.read_csv(path, sep=";", dtype={ "key": str, "urlHash": str, "format": str, "run": str, "file": str }, keep_default_na=False))
+
+    def record(self, sheetFormat: SheetFormat, run: str, folder: str, keys: pd.Series, hashes: pd.Series, shardSheets: int | None = None):
+        """
+        Record the stickers of a PDF generated with `sheetFormat` in `folder`, `keys` and `hashes` in the order the stickers 
+        were drawn. If the PDF was split in files of `shardSheets` sheets, pages are numbered from 1 in every file.
+        """
+        index = np.arange(len(keys))
+        sheet = index // sheetFormat.stickersPerSheet
+        if shardSheets:
+            shard = sheet // shardSheets
+            files = np.array([f"{folder}/{sheetFormat.shardFileName(i)}" for i in range(shard.max(initial=0) + 1)], dtype=object)
+            file, page = files[shard], sheet % shardSheets + 1
+        else:
+            file, page = f"{folder}/{sheetFormat.fileName}", sheet + 1
+        self._new.append(pd.DataFrame({
+            "key": keys.to_numpy(), "urlHash": hashes.to_numpy(), "format": sheetFormat.name, "run": run, "file": file,
+            "page": page, "position": index % sheetFormat.stickersPerSheet + 1
+        }))
+        self.generated += len(keys)
+
+    def delta(self, keys: pd.Series, hashes: pd.Series, formats: pd.Series) -> pd.Series:
+        """Mask of the rows to regenerate: key absent from this manifest, or whose URL or format changed since it was printed."""
+        printed = self.records.drop_duplicates("key", keep="last").set_index("key")
+        previousHash = keys.map(printed["urlHash"])
+        previousFormat = keys.map(printed["format"])
+        return previousHash.isna() | (previousHash != hashes) | (previousFormat != formats)
+
+    def merge(self, previous: "Manifest", keys: pd.Series):
+        """Carry over the records of `previous` for the rows of the inventory (`keys`) that weren't regenerated by this run."""
+        self._flush()
+        records = previous.records
+        carried = records[records["key"].isin(set(keys)) & ~records["key"].isin(set(self.records["key"]))]
+        self._new = [carried]
+        self._flush()
+        self.carried = len(carried)
+
+    def save(self, outputPath: str):
+        self._flush()
+        self.records[MANIFEST_COLS].to_csv(os.path.join(outputPath, MANIFEST_FILE), sep=";", index=False)
+
+    def _flush(self):
+        """Append the records of `record` (and carried over ones) to `records`."""
+        frames = [frame for frame in [self.records, *self._new] if len(frame)]
+        self.records = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=MANIFEST_COLS)
+        self._new = []
+
+    def report(self) -> str:
+        report = f"{self.generated} QR codes générés, {self.carried} inchangés depuis la dernière génération."
+        if self.qrVersions:
+            versions = ", ".join(f"v{version} ({17 + 4 * version}x{17 + 4 * version}) : {count}" for version, count in self.qrVersions.items())
+            report += f"\nVersions de QR code : {versions}."
+        return report
+
+
+def findPreviousManifest(outputRoot: str, exclude: str | None = None) -> str | None:
+    """Manifest of the latest run in `outputRoot` (output folders are named after their timestamp), `exclude` being the current run."""
+    if not os.path.isdir(outputRoot):
+        return None
+    exclude = os.path.normpath(exclude) if exclude else None
+    runs = sorted((entry.path for entry in os.scandir(outputRoot) if entry.is_dir() and os.path.normpath(entry.path) != exclude
+                   and os.path.exists(os.path.join(entry.path, MANIFEST_FILE))), key=os.path.basename)
+    return os.path.join(runs[-1], MANIFEST_FILE) if runs else None
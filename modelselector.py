@@ -0,0 +1,176 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Model/view selector of the QR code format of every equipment model, only  #
+# the visible rows are painted so it scales to thousands of models.         #
+##############################################################################
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QTableView, QStyledItemDelegate, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+
+MODEL_COLUMN, COUNT_COLUMN, FORMAT_COLUMN = 0, 1, 2
+
+
+class ModelFormatTableModel(QAbstractTableModel):
+    """One row per model: name, number of rows of the CSV (computed once by the caller) and selected format description."""
+    HEADERS = ["Modèle", "Instances", "Format de QR code"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.formats: list[str] = []                        # format descriptions, see GenerationConfig.getFormatsStrings
+        self.rows: list[list] = []                          # [model, count, format description]
+
+    def setModels(self, models: list[tuple[str, int]], formats: list[str]):
+        """Replace the rows by `models` (name, count), all associated to the first of `formats`."""
+        self.beginResetModel()
+        self.formats = formats
+        self.rows = [[model, count, self.formats[0]] for model, count in models]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.rows[index.row()][index.column()]   # counts stay ints, sorted numerically
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() == COUNT_COLUMN:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def setData(self, index: QModelIndex, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        if role != Qt.ItemDataRole.EditRole or index.column() != FORMAT_COLUMN or value not in self.formats:
+            return False
+        self.rows[index.row()][FORMAT_COLUMN] = value
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        return flags | Qt.ItemFlag.ItemIsEditable if index.column() == FORMAT_COLUMN else flags
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def setFormatForRows(self, rows: list[int], qrFormat: str):
+        """Associate the models of `rows` to `qrFormat`, a single change notification for the whole range."""
+        if not rows:
+            return
+        for row in rows:
+            self.rows[row][FORMAT_COLUMN] = qrFormat
+        self.dataChanged.emit(self.index(min(rows), FORMAT_COLUMN), self.index(max(rows), FORMAT_COLUMN))
+
+    def removeModels(self, rows: list[int]):
+        """Remove the models of `rows` from the generation."""
+        self.beginResetModel()
+        removed = set(rows)
+        self.rows = [row for i, row in enumerate(self.rows) if i not in removed]
+        self.endResetModel()
+
+    def mapping(self) -> dict[str, str]:
+        """Model to format description, for every model still in the list."""
+        return { model: qrFormat for model, _, qrFormat in self.rows }
+
+
+class FormatDelegate(QStyledItemDelegate):
+    """Combo box editor of the format column, only instantiated for the cell being edited."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.formats: list[str] = []
+
+    def createEditor(self, parent, option, index) -> QComboBox:
+        editor = QComboBox(parent)
+        editor.addItems(self.formats)
+        editor.activated.connect(lambda _: self.commitData.emit(editor))    # commit as soon as a format is picked
+        return editor
+
+    def setEditorData(self, editor: QComboBox, index: QModelIndex):
+        editor.setCurrentText(index.data(Qt.ItemDataRole.EditRole))
+
+    def setModelData(self, editor: QComboBox, model, index: QModelIndex):
+        model.setData(index, editor.currentText(), Qt.ItemDataRole.EditRole)
+
+
+class ModelSelector(QWidget):
+    """
+    Table of the models of the CSV with their number of instances and format, filterable and sortable. The format of a model is
+    edited in place, or applied in bulk to the selected or to the filtered models. `mapping` is read from the table model.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_label = QLabel()
+        self.title_label.setStyleSheet("font-weight: bold; font-size: 16px;")
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filtrer les modèles...")
+
+        self.table_model = ModelFormatTableModel(self)
+        self.proxy_model = QSortFilterProxyModel(self)      # filtering and sorting, the table model keeps the CSV order
+        self.proxy_model.setSourceModel(self.table_model)
+        self.proxy_model.setFilterKeyColumn(MODEL_COLUMN)
+        self.proxy_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.filter_edit.textChanged.connect(self.proxy_model.setFilterFixedString)
+
+        self.table_view = QTableView()
+        self.table_view.setModel(self.proxy_model)
+        self.format_delegate = FormatDelegate(self.table_view)
+        self.table_view.setItemDelegateForColumn(FORMAT_COLUMN, self.format_delegate)
+        self.table_view.setSortingEnabled(True)
+        self.table_view.sortByColumn(MODEL_COLUMN, Qt.SortOrder.AscendingOrder)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table_view.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.SelectedClicked)
+        self.table_view.verticalHeader().setVisible(False)                                      # type: ignore
+        self.table_view.verticalHeader().setDefaultSectionSize(24)                              # type: ignore uniform rows, no per row size hints
+        header = self.table_view.horizontalHeader()
+        header.setSectionResizeMode(MODEL_COLUMN, QHeaderView.ResizeMode.Stretch)               # type: ignore
+        header.setSectionResizeMode(COUNT_COLUMN, QHeaderView.ResizeMode.ResizeToContents)      # type: ignore
+        header.resizeSection(FORMAT_COLUMN, 400)                                                # type: ignore
+
+        self.bulk_format = QComboBox()                      # format applied by the bulk actions
+        self.bulk_format.setFixedWidth(350)
+        self.apply_selection_button = QPushButton("Appliquer à la sélection")
+        self.apply_selection_button.clicked.connect(lambda _: self.table_model.setFormatForRows(self.selectedRows(), self.bulk_format.currentText()))
+        self.apply_filtered_button = QPushButton("Appliquer aux modèles filtrés")
+        self.apply_filtered_button.clicked.connect(lambda _: self.table_model.setFormatForRows(self.filteredRows(), self.bulk_format.currentText()))
+        self.remove_button = QPushButton("Retirer la sélection")
+        self.remove_button.clicked.connect(lambda _: self.table_model.removeModels(self.selectedRows()))
+
+        bulk_layout = QHBoxLayout()
+        bulk_layout.addWidget(self.bulk_format)
+        bulk_layout.addWidget(self.apply_selection_button)
+        bulk_layout.addWidget(self.apply_filtered_button)
+        bulk_layout.addStretch()
+        bulk_layout.addWidget(self.remove_button)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.title_label)
+        layout.addWidget(self.filter_edit)
+        layout.addWidget(self.table_view)
+        layout.addLayout(bulk_layout)
+
+    def setModels(self, title: str, models: list[tuple[str, int]], formats: list[str]):
+        """Show `models` (name, number of instances), all associated to the first of the `formats` descriptions."""
+        self.title_label.setText(title)
+        self.format_delegate.formats = formats
+        self.bulk_format.clear()
+        self.bulk_format.addItems(formats)
+        self.table_model.setModels(models, formats)
+
+    def selectedRows(self) -> list[int]:
+        """Rows of the table model of the selected models."""
+        return [self.proxy_model.mapToSource(index).row() for index in self.table_view.selectionModel().selectedRows()]  # type: ignore
+
+    def filteredRows(self) -> list[int]:
+        """Rows of the table model of the models matching the filter."""
+        return [self.proxy_model.mapToSource(self.proxy_model.index(i, 0)).row() for i in range(self.proxy_model.rowCount())]
+
+    def mapping(self) -> dict[str, str]:
+        return self.table_model.mapping()
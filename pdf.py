@@ -3,42 +3,103 @@
 # reportlab/python-qrcode based functions to generate PDFs following Avery   #
 # Zweckform formats 3424, 3483 3661.                                         #
 ##############################################################################
+import io
+import os
+import atexit
+import hashlib
 import qrcode
-import textwrap
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from PIL import Image
 from typing import cast
-from urllib.parse import urlencode
+from itertools import islice
+from collections import deque, Counter
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from progress import ProgressCallback
+from qrcache import QRImageCache
+from qrraster import QRStencil, renderRoundedQR, renderRoundedQRMask
+from instrumentation import Instrumentation, NO_INSTRUMENTATION
+from layout import SheetFormat, LogoRegion, QRRegion, TextRegion
+from manifest import rowKeys, urlHashes
+from textlayout import wrapCaption, fit_text_to_width
+from urllib.parse import urlencode, quote_plus
+from reportlab import rl_config
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
-from PyQt6.QtCore import QCoreApplication
+from reportlab.pdfbase.pdfdoc import PDFImageXObject, PDFStream, PDFName, PDFArray
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase.ttfonts import TTFont
-from qrcode.constants import ERROR_CORRECT_L
-from qrcode.image.styledpil import StyledPilImage
-from reportlab.pdfbase.pdfmetrics import stringWidth
-from qrcode.image.styles.colormasks import SolidFillColorMask
-from PyQt6.QtWidgets import QProgressBar, QProgressBar, QLabel
-from qrcode.image.styles.moduledrawers.pil import RoundedModuleDrawer
+from qrcode import util as qrutil
+from qrcode.constants import ERROR_CORRECT_L, ERROR_CORRECT_Q
 
 
-class ProgressBarState:     # state is set by main window when a file is loaded.
-    def __init__(self, progressBar: QProgressBar, label: QLabel):
-        self.progressBar: QProgressBar = progressBar
-        self.label: QLabel = label
+PRINT_DPI = 300                             # resolution of the printers the label sheets are printed on
+PREVIEW_DPI = 72                            # resolution of the QR codes of the previews, see `genPreviewPDF`
+
+
+class RenderOptions:        # tuning knobs of the generators, independent of the sticker format.
+    def __init__(self, workers: int = os.cpu_count() or 1, cache: QRImageCache | None = None, vector: bool = False,
+                 instrumentation: Instrumentation = NO_INSTRUMENTATION, shardSheets: int | None = None, payload: str = "full",
+                 dpi: int | None = PRINT_DPI):
+        self.workers: int = workers         # number of processes rasterizing QR codes, 1 renders them in the calling process.
+        self.cache: QRImageCache | None = cache     # persistent cache of rendered QR codes, None renders every QR code.
+        self.vector: bool = vector          # draw QR codes as PDF paths of square modules, sharp at any scale, smallest PDFs.
+        self.instrumentation: Instrumentation = instrumentation    # stage timers, disabled by default.
+        self.shardSheets: int | None = shardSheets  # split every PDF in files of that many sheets, see `SheetFormat.shardFileName`.
+        self.payload: str = payload         # what the QR codes encode, see `PAYLOADS` and `buildUrls`.
+        self.dpi: int | None = dpi          # QR codes rasterized for this print resolution as 1 bit stencils, None for antialiased RGB images.
+
+
+MIN_ROWS_PER_WORKER = 8                     # below this many rows per worker, inter process overhead outweighs the parallel speedup.
+MAX_CHUNK_SIZE = 32                         # QR codes per task sent to a worker
+CHUNKS_AHEAD_PER_WORKER = 2                 # tasks in flight per worker, bounds the QR codes rendered ahead of the drawing loop
+
+_renderPool: ProcessPoolExecutor | None = None
+_renderPoolWorkers: int = 0
 
 
 HRC_LOGO_WIDTH, HRC_LOGO_HEIGHT = 62 * mm, 24 * mm                      # official HRC logo parameters
 
-LOGO = Image.open("./assets/hrc-logo-simplified.png").convert("RGBA")   # simplified HRC logo parameters
-LOGO_SIZE_RATIO: float = 0.3
-LOGO_WIDTH, LOGO_HEIGHT = int(LOGO.size[0] * LOGO_SIZE_RATIO), int(LOGO.size[1] * LOGO_SIZE_RATIO)
-LOGO = LOGO.resize((LOGO_WIDTH, LOGO_HEIGHT))
+LOGO_SIZE_RATIO: float = 0.3                                            # resolution of the embedded simplified HRC logo, relative to its asset
+LOGO_QR_RATIO: float = 0.24                                             # width of the logo stamped over a QR code, relative to the QR code
+LOGO_ERROR_CORRECTION = ERROR_CORRECT_Q                                 # QR codes under the logo, see `qrErrorCorrection`
+
+QR_BACK_COLOR, QR_FRONT_COLOR = (255, 255, 255), (1, 158, 227)          # HRC blue on white
+QR_STYLE = {                                                            # every parameter affecting the rendered QR code, used as cache key
+    "error_correction": ERROR_CORRECT_L, "box_size": 10, "border": 4,
+    "module_drawer": "RoundedModuleDrawer", "eye_drawer": "RoundedModuleDrawer",
+    "back_color": QR_BACK_COLOR, "front_color": QR_FRONT_COLOR
+}
+
+rl_config.useA85 = 0                                                    # binary PDF streams, ASCII85 only inflates them by 25%
+
+
+class LogoAssets:           # simplified HRC logo stamped in the middle of QR codes, see `getLogo`.
+    def __init__(self, path: str = "./assets/hrc-logo-simplified.png"):
+        image = Image.open(path).convert("RGBA")
+        self.width, self.height = int(image.size[0] * LOGO_SIZE_RATIO), int(image.size[1] * LOGO_SIZE_RATIO)
+        self.image = image.resize((self.width, self.height))
+        self.reader = ImageReader(self.image)                           # single reader, reportlab stores the logo once per PDF
+
 
-pdfmetrics.registerFont(TTFont('NettoVDR', './assets/NettoOffc.ttf'))
-pdfmetrics.registerFont(TTFont('NettoBold', './assets/NettoOffc-Bold.ttf'))
+@lru_cache(maxsize=None)
+def getLogo() -> LogoAssets:
+    """Logo loaded on first use rather than at import, importing this module stays cheap (GUI start up, render workers)."""
+    return LogoAssets()
+
+
+@lru_cache(maxsize=None)
+def registerFonts():
+    """Register the Netto fonts with reportlab, once, before the first PDF is drawn."""
+    pdfmetrics.registerFont(TTFont('NettoVDR', './assets/NettoOffc.ttf'))
+    pdfmetrics.registerFont(TTFont('NettoBold', './assets/NettoOffc-Bold.ttf'))
+
+
+URL_PREFIX = "https://apps-hrc.adi.adies.lan/mailer/new-ticket?"
 
 
 def getUrlFrom(row: pd.Series):
@@ -48,199 +109,545 @@ def getUrlFrom(row: pd.Series):
         params[col] = cast(str, row[col])
 
     encoded_query = urlencode(params, encoding='utf-8')
-    return "https://apps-hrc.adi.adies.lan/mailer/new-ticket?" + encoded_query
+    return URL_PREFIX + encoded_query
+
 
+def _encodeColumn(values: pd.Series) -> np.ndarray:
+    """Percent-encode a column the way `urlencode` does, each distinct value is only encoded once."""
+    codes, uniques = pd.factorize(values.astype(str))
+    encodedUniques = np.array([quote_plus(value, encoding='utf-8') for value in uniques], dtype=object)
+    return encodedUniques[codes]
 
-def genPDFsWithAveryZweckform3483Format(is_eq_csv: bool, entries: pd.DataFrame, progressBar: ProgressBarState, outputPath: str, qrCaption: str): 
+
+PAYLOADS = ["full", "compact", "id"]
+COMPACT_KEYS = {                                    # short query keys of the compact payload, to be understood by the mailer.
+    "Catégorie": "c", "Modèle": "m", "Code matériel": "h", "Numéro de Série": "s", "Numéro de Signalétique": "n", "Localisation": "l"
+}
+
+
+def buildUrls(entries: pd.DataFrame, payload: str = "full") -> list[str]:
     """
-    Generate a pdf containing QR codes for each row of `entries` using Avery Zweckform 3483 format (large vertical). Logo on top, QR 
-    in middle, `qrCaption` underneath. If `is_eq_csv` is True, equipment info will be added as last line, otherwise, meeting room info. 
-    `progressBar` is used to update the progress bar in the calling parent window. Sticker format is (width, height) = (10.4 cm, 14.7 cm)
+    Columnar equivalent of calling `getUrlFrom` on every row of `entries`: every column is percent-encoded in one pass,
+    then the query strings are concatenated column by column. Same parameter order as `getUrlFrom`, `Catégorie` first.
+    `payload` selects what is encoded:
+     - "full", every column with its name as key, as `getUrlFrom` does.
+     - "compact", the same values under the one letter keys of `COMPACT_KEYS`, about 60 bytes less per URL.
+     - "id", only the asset identifier (see `manifest.rowKeys`), the mailer resolves it with the lookup table written with the PDFs.
     """
-    progressBar.progressBar.setValue(0)
+    if payload not in PAYLOADS:
+        raise Exception(f"Contenu de QR code inconnu '{payload}'. Contenus disponibles : {PAYLOADS}.")
+    if payload == "id":
+        keys = rowKeys(entries, is_eq_csv="Numéro de Série" in entries.columns)
+        return (URL_PREFIX + "id=" + _encodeColumn(keys)).tolist()
     
-    QRCodeSize = 100 * mm
-    _, height = A4
+    columns = ["Catégorie"] + [col for col in entries.columns if col != "Catégorie"]
     
-    xStart, yStart = 15 * mm, height - 33 * mm
-    x, y = xStart, yStart
+    urls = np.full(entries.shape[0], URL_PREFIX, dtype=object)
+    for i, col in enumerate(columns):
+        if col in entries.columns:
+            encoded = _encodeColumn(entries[col])
+        else:                                           # meeting rooms CSV, no category column
+            encoded = quote_plus("Salle de Réunion", encoding='utf-8')
+        key = COMPACT_KEYS.get(col, col) if payload == "compact" else col
+        urls = urls + (("&" if i > 0 else "") + quote_plus(key, encoding='utf-8') + "=") + encoded
     
-    c = canvas.Canvas(outputPath + "/largeVerticalQRs.pdf", pagesize=A4)
+    return urls.tolist()
+
+
+def qrErrorCorrection(embbed_logo: bool) -> int:
+    """
+    Error correction level of the QR codes of a format: `LOGO_ERROR_CORRECTION` if the logo is stamped over them, it hides 
+    their middle modules whatever their version (about 9% of the data modules of a version 4 code, Q restores up to 25% of the
+    codewords, L only 7%). `QR_STYLE` level otherwise, the smallest codes.
+    """
+    return LOGO_ERROR_CORRECTION if embbed_logo else QR_STYLE["error_correction"]
+
+
+def qrVersion(url: str, errorCorrection: int = QR_STYLE["error_correction"]) -> int:
+    """
+    Version (1 to 40, 17 + 4 * version modules per side) of the QR code encoding `url` at `errorCorrection`, same result as 
+    `QRCode.best_fit` without filling a bit buffer, an order of magnitude faster. Data is split in numeric, alphanumeric and 
+    byte segments the way python-qrcode does it.
+    """
+    bitLimits = qrutil.BIT_LIMIT_TABLE[errorCorrection]
+    segments = [(chunk.mode, len(chunk.data)) for chunk in qrutil.optimal_data_chunks(url, minimum=20)]  # QRCode(optimize=20) default
+    dataBits = sum(
+        10 * (n // 3) + (0, 4, 7)[n % 3] if mode == qrutil.MODE_NUMBER else 11 * (n // 2) + 6 * (n % 2) if mode == qrutil.MODE_ALPHA_NUM else 8 * n
+        for mode, n in segments
+    )
+    for version in range(1, 41):
+        modeSizes = qrutil.mode_sizes_for_version(version)
+        if dataBits + sum(4 + modeSizes[mode] for mode, _ in segments) <= bitLimits[version]:
+            return version
+    raise Exception(f"Contenu trop long pour un QR code ({len(url)} caractères).")
+
+
+def qrVersionCounts(urls: list[str], errorCorrection: int = QR_STYLE["error_correction"]) -> dict[int, int]:
+    """Number of QR codes of every version among `urls` encoded at `errorCorrection`, sorted by version."""
+    counts = pd.Series([qrVersion(url, errorCorrection) for url in urls], dtype=int).value_counts().sort_index()
+    return { int(version): int(count) for version, count in counts.items() }
+
+
+def buildInfoLines(entries: pd.DataFrame, is_eq_csv: bool) -> list[str]:
+    """Bold last line of every sticker, **Modèle Code matériel** or **Salle de Réunion Numéro de Signalétique Localisation**."""
+    if is_eq_csv:
+        lines = entries["Modèle"].astype(str) + " " + entries["Code matériel"].astype(str)
+    else:
+        lines = "Salle de Réunion " + entries["Numéro de Signalétique"].astype(str) + " " + entries["Localisation"].astype(str)
+    return lines.tolist()
+
+
+_, A4_HEIGHT = A4
+
+AVERY_ZWECKFORM_3483 = SheetFormat(             # large vertical, logo on top, QR in middle, caption underneath. (10.4 cm, 14.7 cm)
+    name="3483", fileName="largeVerticalQRs.pdf", pageSize=A4, columns=2, rows=2,
+    origin=(15 * mm, A4_HEIGHT - 33 * mm), pitch=(104 * mm, 149 * mm),
+    logo=LogoRegion(0, 0, 1.25 * HRC_LOGO_WIDTH, 1.25 * HRC_LOGO_HEIGHT),
+    qr=QRRegion(-12 * mm, -100 * mm, 100 * mm),
+    text=TextRegion(38 * mm, -100 * mm, maxWidth=90 * mm, maxFontSize=16, maxLines=2)
+)
+
+AVERY_ZWECKFORM_3424 = SheetFormat(             # medium horizontal, logo top left, caption bottom left, QR to the right. (10.4 cm, 4.8 cm)
+    name="3424", fileName="mediumHoriQRs.pdf", pageSize=A4, columns=2, rows=6,
+    origin=(3 * mm, A4_HEIGHT - 26 * mm), pitch=(105 * mm, 50 * mm),
+    logo=LogoRegion(0, 0, 0.9 * HRC_LOGO_WIDTH, 0.9 * HRC_LOGO_HEIGHT),
+    qr=QRRegion(55 * mm, -((44 * mm) // 2) + 2 * mm, 44 * mm),
+    text=TextRegion(27 * mm, -12, maxWidth=HRC_LOGO_WIDTH - 10 * mm, maxFontSize=12, maxLines=3)
+)
+
+AVERY_ZWECKFORM_3661 = SheetFormat(             # small squares, QR code with logo at the top, caption underneath. (6.9 cm, 6.7 cm)
+    name="3661", fileName="smallSquareQRs.pdf", pageSize=A4, columns=3, rows=4,
+    origin=(2.5 * mm, A4_HEIGHT - 10 * mm - 58 * mm), pitch=(72.5 * mm, 70 * mm),
+    qr=QRRegion(0, 0, 60 * mm, embbedLogo=True),
+    text=TextRegion(30 * mm, 0, maxWidth=60 * mm, maxFontSize=10, maxLines=2)
+)
+
+
+def genPDFsWithSheetFormat(sheetFormat: SheetFormat, is_eq_csv: bool, entries: pd.DataFrame, progress: ProgressCallback, outputPath: str, qrCaption: str, options: RenderOptions | None = None) -> list[str]:
+    """
+    Generate a pdf containing a sticker for each row of `entries`, laid out following `sheetFormat`. Every sticker has a QR code,
+    `qrCaption` and, as last line, equipment info if `is_eq_csv` is True, meeting room info otherwise. `progress` is notified of
+    every processed row and of every written PDF. If `options.shardSheets` is set, the stickers are split in PDFs of that many 
+    sheets, each one saved (and its pages released) as soon as it is full, so memory doesn't grow with the number of rows. 
+    Returns the paths of the written PDFs.
+    """
+    options = options or RenderOptions()
+    timer = options.instrumentation
+    registerFonts()
+    progress.start(entries.shape[0])
     
-    count = 0
+    with timer.stage("urls.build"):
+        urls = buildUrls(entries, options.payload)
+    with timer.stage("text.infoLines"):
+        infoLines = buildInfoLines(entries, is_eq_csv)
+    with timer.stage("qr.submit"):
+        qrCodes = renderQRCodes(urls, options, sheetFormat.qr.size, sheetFormat.qr.embbedLogo)    # rendered in parallel ahead of the drawing loop, in row order
+        sharedUrls = [url for url, count in Counter(urls).items() if count > 1]
+        qrFormNames = { url: "qr" + digest for url, digest in zip(sharedUrls, urlHashes(sharedUrls)) }    # QR codes of several stickers
     
-    for index, (_, row) in enumerate(entries.iterrows()):
-        c.drawImage("./assets/hrc-logo.jpg", x, y, width=1.25*HRC_LOGO_WIDTH, height=1.25*HRC_LOGO_HEIGHT)
-        
-        y -= QRCodeSize
-        x -= 12 * mm
-        
-        url = getUrlFrom(row)
-        updateProgressBar(index, entries, url, progressBar)
-        c.drawImage(getQRImageReaderFromRow(url), x, y, width=QRCodeSize, height=QRCodeSize)                    # draw the QR code
-        drawText(c=c, row=row, x=x + QRCodeSize / 2, yText=y, is_eq_csv=is_eq_csv, qrCaption=qrCaption, maxTextWidth=QRCodeSize - 10 * mm, maxFontSize=16, max_lines=2)
-        
-        count += 1
+    slots = sheetFormat.slots
+    stickersPerFile = options.shardSheets * len(slots) if options.shardSheets else None
+    written: list[str] = []
+    
+    def openCanvas(shard: int) -> canvas.Canvas:
+        fileName = sheetFormat.shardFileName(shard) if stickersPerFile else sheetFormat.fileName
+        return canvas.Canvas(os.path.join(outputPath, fileName), pagesize=sheetFormat.pageSize)
+    
+    def save(c: canvas.Canvas):
+        with timer.stage("pdf.save"):
+            c.save()
+        written.append(c._filename)
+        progress.pdfWritten(c._filename)
+    
+    c = openCanvas(0)
+    for index, (url, infoLine) in enumerate(zip(urls, infoLines)):
+        slot = index % len(slots)
+        if stickersPerFile and index > 0 and index % stickersPerFile == 0:  # previous shard is full
+            save(c)
+            c = openCanvas(index // stickersPerFile)
+        elif slot == 0 and index > 0:               # previous sheet is full
+            with timer.stage("pdf.showPage"):
+                c.showPage()
         
-        if count % 4 == 0:
-            c.showPage()
-            x, y = xStart, yStart
-            count = 0
-        else:
-            # manually hardcore all QR code positions (coded to fit to a 3483 sticker sheet)
-            if count == 1:
-                x, y = 119 * mm, yStart
-            elif count == 2:
-                x, y = 15 * mm, height - 182 * mm
-            elif count == 3:
-                x, y = 119 * mm, height - 182 * mm
+        progress.advance(index, entries.shape[0], url)
+        with timer.stage("qr.render"):              # waiting on the workers, or rendering in process
+            qrCode = next(qrCodes)
+        x, y = slots[slot]
+        drawSticker(c, sheetFormat, x, y, qrCode, infoLine, qrCaption, timer, qrFormNames.get(url))
     
-    progressBar.progressBar.setValue(100)
+    progress.finish()
+    save(c)
+    timer.count("rows", entries.shape[0])
+    timer.count("pages", -(-entries.shape[0] // len(slots)))
+    timer.count("files", len(written))
+    return written
+
+
+def genPreviewPDF(sheetFormat: SheetFormat, is_eq_csv: bool, entries: pd.DataFrame, qrCaption: str, payload: str = "full") -> bytes:
+    """
+    In memory PDF of the first sheet of stickers of `entries`, laid out and drawn as `genPDFsWithSheetFormat` does, for a live
+    preview of the caption and layout. QR codes are low resolution stencils cached across previews (see `getPreviewQRStencil`),
+    editing the caption doesn't encode them again.
+    """
+    registerFonts()
+    entries = entries.iloc[:sheetFormat.stickersPerSheet]
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=sheetFormat.pageSize)
+    for (x, y), url, infoLine in zip(sheetFormat.slots, buildUrls(entries, payload), buildInfoLines(entries, is_eq_csv)):
+        drawSticker(c, sheetFormat, x, y, getPreviewQRStencil(url, sheetFormat.qr.size, qrErrorCorrection(sheetFormat.qr.embbedLogo)), infoLine, qrCaption)
+    c.showPage()
     c.save()
+    return buffer.getvalue()
+
+
+def drawSticker(c: canvas.Canvas, sheetFormat: SheetFormat, x: float, y: float, qrCode: Image.Image | QRStencil | list[list[bool]], infoLine: str, qrCaption: str,
+                timer: Instrumentation = NO_INSTRUMENTATION, qrFormName: str | None = None):
+    """Draw the regions of a `sheetFormat` sticker whose origin is (x, y), the QR code from the `qrFormName` form if set (see `drawQRCode`)."""
+    logo, qr, text = sheetFormat.logo, sheetFormat.qr, sheetFormat.text
+    if logo is not None:
+        with timer.stage("logo.draw"):
+            drawHRCLogo(c, x + logo.dx, y + logo.dy, width=logo.width, height=logo.height)
+    
+    with timer.stage("qr.draw"):
+        drawQRCode(c, qrCode, x + qr.dx, y + qr.dy, qr.size, qr.embbedLogo, qrFormName)
+    with timer.stage("text.draw"):                  # text layout (cached) and drawing
+        drawText(c=c, infoLine=infoLine, x=x + text.dx, yText=y + text.dy, qrCaption=qrCaption, maxTextWidth=text.maxWidth, maxFontSize=text.maxFontSize, max_lines=text.maxLines)
+
+
+def getQRImageFromUrl(url: str, errorCorrection: int = QR_STYLE["error_correction"]) -> Image.Image:
+    """RGB image of the QR code encoding `url` at `errorCorrection`, without logo (see `drawQRCode`)."""
+    qr = qrcode.QRCode(error_correction=errorCorrection, box_size=QR_STYLE["box_size"], border=QR_STYLE["border"])
+    qr.add_data(url)
+    return renderRoundedQR(qr.get_matrix(), QR_STYLE["box_size"], QR_BACK_COLOR, QR_FRONT_COLOR)   # same pixels as StyledPilImage, see qrraster.py
+
+
+def qrBoxSize(size: float, modules: int, dpi: int) -> int:
+    """
+    Pixels per module of a QR code of `modules` modules per side (border included) printed at most `size` points wide at `dpi`:
+    the largest whole number of device pixels that fits. The stencil is drawn at its native size, one pixel per device pixel
+    (see `drawQRStencil`), so the printer never resamples it. At least 2, rounded corners are drawn per half module.
+    """
+    return max(2, int(size / 72 * dpi / modules))
+
+
+def getQRStencilFromUrl(url: str, size: float, dpi: int, errorCorrection: int = QR_STYLE["error_correction"]) -> QRStencil:
+    """1 bit stencil of the QR code encoding `url` at `errorCorrection`, rasterized for being printed `size` points wide at `dpi`, see `drawQRStencil`."""
+    qr = qrcode.QRCode(error_correction=errorCorrection, box_size=QR_STYLE["box_size"], border=QR_STYLE["border"])
+    qr.add_data(url)
+    matrix = qr.get_matrix()
+    return QRStencil.fromMask(renderRoundedQRMask(matrix, qrBoxSize(size, len(matrix), dpi)), len(matrix), dpi)
+
+
+def getQRMatrixFromUrl(url: str, errorCorrection: int = QR_STYLE["error_correction"]) -> list[list[bool]]:
+    """Module matrix (border included, True for dark modules) of the QR code encoding `url` at `errorCorrection`, for vector drawing."""
+    qr = qrcode.QRCode(error_correction=errorCorrection, box_size=QR_STYLE["box_size"], border=QR_STYLE["border"])
+    qr.add_data(url)
+    return qr.get_matrix()
+
+
+@lru_cache(maxsize=256)
+def getPreviewQRStencil(url: str, size: float, errorCorrection: int = QR_STYLE["error_correction"]) -> QRStencil:
+    """
+    1 bit stencil of a previewed QR code printed `size` points wide, rasterized at `PREVIEW_DPI` and memoized, previews draw the 
+    same few sheets over and over. Same version (size) as the printed QR code, but with the first mask pattern rather than the 
+    best of the 8: choosing it is about 3/4 of the encoding time and a module is smaller than a pixel of a preview.
+    """
+    qr = qrcode.QRCode(error_correction=errorCorrection, box_size=QR_STYLE["box_size"], border=QR_STYLE["border"], mask_pattern=0)
+    qr.add_data(url)
+    matrix = qr.get_matrix()
+    return QRStencil.fromMask(renderRoundedQRMask(matrix, qrBoxSize(size, len(matrix), PREVIEW_DPI)), len(matrix), PREVIEW_DPI)
 
 
-def genPDFsWithAveryZweckform3424Format(is_eq_csv: bool, entries: pd.DataFrame, progressBar: ProgressBarState, outputPath: str, qrCaption: str):
+def drawQRCode(c: canvas.Canvas, qrCode: Image.Image | QRStencil | list[list[bool]], x: float, y: float, size: float, embbed_logo: bool,
+               formName: str | None = None):
     """
-    Generate a pdf containing QR codes for each row of `entries` using Avery Zweckform 3424 format (medium size, horizontal). Logo top left, 
-    `qrCaption` bottom left, QR to the right. If `is_eq_csv` is True, equipment info will be added as last line, otherwise, meeting room info. 
-    `progressBar` is used to update the progress bar in the calling parent window. Sticker format is (width, height) = (10.4 cm, 4.8 cm)
+    Draw a QR code returned by `renderQRCodes` with its bottom left corner at (x, y), either as an image, a 1 bit stencil or as
+    vector paths. If `embbed_logo`, the simplified logo is stamped in the middle, `LOGO_QR_RATIO` of the QR code wide whatever 
+    its version, the QR code must have been rendered with `embbed_logo` (see `qrErrorCorrection`). If `formName` is set, the QR code is stamped from the form of that name, recorded the first time: a QR code
+    printed on several stickers of a PDF is stored once and never hashed again, see `genPDFsWithSheetFormat`.
     """
-    progressBar.progressBar.setValue(0)
+    if formName is not None:
+        stampForm(c, formName, x, y, lambda form: _drawQRModules(form, qrCode, 0, 0, size))
+    else:
+        _drawQRModules(c, qrCode, x, y, size)
     
-    QRCodeSize = 44 * mm
-    _, height = A4
-    xStart, yStart = 3 * mm, height - 26 * mm
-    x, y = xStart, yStart
-    maxFontSize = 12
+    if embbed_logo:
+        logo = getLogo()
+        logoWidth = size * LOGO_QR_RATIO
+        logoHeight = logoWidth * logo.height / logo.width
+        stampForm(c, f"logoOverlay{logoWidth:.2f}x{logoHeight:.2f}", x + (size - logoWidth) / 2, y + (size - logoHeight) / 2,
+                  lambda form: form.drawImage(logo.reader, 0, 0, width=logoWidth, height=logoHeight, mask='auto'))
+
+
+def _drawQRModules(c: canvas.Canvas, qrCode: Image.Image | QRStencil | list[list[bool]], x: float, y: float, size: float):
+    if isinstance(qrCode, QRStencil):
+        drawQRStencil(c, qrCode, x, y, size)
+    elif isinstance(qrCode, Image.Image):
+        c.drawImage(ImageReader(qrCode), x, y, width=size, height=size)
+    else:
+        drawQRVector(c, qrCode, x, y, size)
+
+
+class StencilXObject(PDFImageXObject):
+    """1 bit image XObject used as a stencil mask: its 0 pixels are painted with the current fill colour, the others leave the page as is."""
+    def __init__(self, stencil: QRStencil):
+        super().__init__(stencil.name)
+        self.width, self.height = stencil.width, stencil.height
+        self.streamContent = stencil.stream                         # compressed packed rows of bits, embedded as is
+
+    def format(self, document):
+        stream = PDFStream(content=self.streamContent)
+        entries = {
+            "Type": PDFName("XObject"), "Subtype": PDFName("Image"), "Width": self.width, "Height": self.height,
+            "ImageMask": "true", "BitsPerComponent": 1, "Filter": PDFArray([PDFName("FlateDecode")]), "Length": len(self.streamContent)
+        }
+        for key, value in entries.items():
+            stream.dictionary[key] = value
+        return stream.format(document)
+
+
+def drawQRStencil(c: canvas.Canvas, stencil: QRStencil, x: float, y: float, size: float):
+    """
+    Paint the dark pixels of `stencil` (see `getQRStencilFromUrl`) in HRC blue, centred in the `size` points wide square whose
+    bottom left corner is (x, y). It is drawn at its native size (`QRStencil.points`), never stretched: every module covers 
+    whole device pixels. reportlab only embeds 8 bits images, the XObject is registered the way `Canvas.drawImage` does it. 
+    The stream and the name were computed with the stencil, identical QR codes are stored once per PDF.
+    """
+    name = stencil.name
+    regName = c._doc.getXObjectName(name)
+    if c._doc.idToObject.get(regName) is None:
+        xobject = StencilXObject(stencil)
+        c._setXObjects(xobject)
+        c._doc.Reference(xobject, regName)
+        c._doc.addForm(name, xobject)
     
-    c = canvas.Canvas(outputPath + "/mediumHoriQRs.pdf", pagesize=A4)
+    c.saveState()
+    c.setFillColorRGB(*(channel / 255 for channel in QR_FRONT_COLOR))
+    width = stencil.points
+    c.translate(x + (size - width) / 2, y + (size - width) / 2)
+    c.scale(width, width)
+    c._code.append(f"/{regName} Do")
+    c.restoreState()
+    c._formsinuse.append(name)                                  # listed in the resources of the page
+
+
+def drawQRVector(c: canvas.Canvas, matrix: list[list[bool]], x: float, y: float, size: float):
+    """
+    Draw the QR code `matrix` in HRC blue as a single filled path of square modules, sharp at any scale. The path is a list of
+    rectangles with integer coordinates in module units (scaled to `size` points): every horizontal run of dark modules, merged
+    with the identical runs of the rows below it. Written straight to the content stream, a few bytes per rectangle, smaller
+    than the 1 bit stencils of `drawQRStencil`.
+    """
+    n = len(matrix)
+    rects: list[list[int]] = []                         # [column, top row, width, height]
+    above: dict[tuple[int, int], list[int]] = {}        # rectangles ending on the previous row, by (column, width)
+    for row in range(n):
+        current = {}
+        for first, width in _darkRuns(matrix[row]):
+            rect = above.get((first, width))
+            if rect is None:
+                rect = [first, row, width, 0]
+                rects.append(rect)
+            rect[3] += 1
+            current[(first, width)] = rect
+        above = current
     
-    count = 0
-    for index, (_, row) in enumerate(entries.iterrows()):
-        c.drawImage("./assets/hrc-logo.jpg", x, y, width=0.9*HRC_LOGO_WIDTH, height=0.9*HRC_LOGO_HEIGHT)
-        drawText(c=c, row=row, x=x + 27*mm, yText=y - maxFontSize, is_eq_csv=is_eq_csv, qrCaption=qrCaption, maxTextWidth=HRC_LOGO_WIDTH - 10 * mm, maxFontSize=maxFontSize, max_lines=3)
-        
-        x += 55*mm                  # move cursor bottom right of text to draw QR code
-        
-        url = getUrlFrom(row)
-        updateProgressBar(index, entries, url, progressBar)
-        c.drawImage(getQRImageReaderFromRow(url), x, y - (QRCodeSize // 2) + 2 * mm, width=QRCodeSize, height=QRCodeSize)
-        
-        count += 1
-        
-        y = yStart - (count // 2) * 50 * mm   # (count // 2) is the line number we're on
-        
-        if count % 2 != 0:          # i.e. we're in the second column
-            x = 105*mm + xStart     # middle point + margin
+    c.saveState()
+    c.translate(x, y)
+    c.scale(size / n, size / n)
+    c.setFillColorRGB(*(channel / 255 for channel in QR_FRONT_COLOR))
+    c._code.append(" ".join(f"{col} {n - top - height} {width} {height} re" for col, top, width, height in rects) + " f")
+    c.restoreState()
+
+
+def _darkRuns(row: list[bool]) -> Iterator[tuple[int, int]]:
+    """(first column, width) of every run of dark modules of `row`."""
+    col, n = 0, len(row)
+    while col < n:
+        if row[col]:
+            first = col
+            while col < n and row[col]:
+                col += 1
+            yield first, col - first
         else:
-            x = xStart
-        
-        if count == 12:
-            c.showPage()
-            x, y = xStart, yStart
-            count = 0
-    
-    progressBar.progressBar.setValue(100)
-    c.save()
+            col += 1
+
 
+def drawHRCLogo(c: canvas.Canvas, x: float, y: float, width: float, height: float):
+    """Official HRC logo with bottom left corner at (x, y), stamped from a form registered once per PDF and size."""
+    stampForm(c, f"hrcLogo{width:.2f}x{height:.2f}", x, y, lambda form: form.drawImage("./assets/hrc-logo.jpg", 0, 0, width=width, height=height))
 
-def genPDFsWithAveryZweckform3661Format(is_eq_csv: bool, entries: pd.DataFrame, progressBar: ProgressBarState, outputPath: str, qrCaption: str):
+
+def stampForm(c: canvas.Canvas, name: str, x: float, y: float, draw: Callable[[canvas.Canvas], None]):
     """
-    Generate a pdf containing QR codes for each row of `entries` using Avery Zweckform 3661 format (small squares). QR code at the top, `qrCaption` 
-    underneath, If `is_eq_csv` is True, equipment info will be added as last line, otherwise, meeting room info. `progressBar` is used to update 
-    the progress bar in the calling parent window. Sticker format is (width, height) = (6.9 cm, 6.7 cm)
+    Draw the form XObject `name` with its origin at (x, y). The first time `name` is used in the PDF of `c`, the form is 
+    recorded by calling `draw`, which must draw relative to the origin. Every later use only references it, the artwork 
+    is stored once per PDF and costs a single operator per sticker.
     """
-    progressBar.progressBar.setValue(0)
-    
-    QRCodeSize = 60 * mm
-    _, height = A4
-    xStart, yStart = 2.5 * mm, height - 10 * mm - 58 * mm                                       # top-margin minus 5 height of sticker square (Zweckform 3661)
-    x, y = xStart, yStart
-    
-    c = canvas.Canvas(outputPath + "/smallSquareQRs.pdf", pagesize=A4)
+    if not c.hasForm(name):
+        width, height = c._pagesize
+        c.beginForm(name, lowerx=-width, lowery=-height, upperx=width, uppery=height)   # generous bounding box, forms are clipped to it
+        draw(c)
+        c.endForm()
     
-    count = 0
-    for index, (_, row) in enumerate(entries.iterrows()):
-        url = getUrlFrom(row)
-        updateProgressBar(index, entries, url, progressBar)
-        c.drawImage(getQRImageReaderFromRow(url, True), x, y, width=QRCodeSize, height=QRCodeSize)
-        drawText(c=c, row=row, x=x + 30*mm, yText=y, is_eq_csv=is_eq_csv, qrCaption=qrCaption, maxTextWidth=QRCodeSize, maxFontSize=10, max_lines=2)
-        
-        count += 1
-        y = yStart - (count // 3) * 70 * mm   # (count // 3) is the line number we're on
-        
-        if count % 3 != 0:                    # i.e. we just drew the qr code in the third column
-            x += 70*mm + xStart                # width of square + margin
+    c.saveState()
+    c.translate(x, y)
+    c.doForm(name)
+    c.restoreState()
+
+
+def getRenderPool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by every generated PDF and generation job, so that worker start up is only paid once per run."""
+    global _renderPool, _renderPoolWorkers
+    if _renderPool is None or _renderPoolWorkers != workers:
+        if _renderPool is not None:
+            _renderPool.shutdown()
+        _renderPool, _renderPoolWorkers = ProcessPoolExecutor(max_workers=workers), workers
+    return _renderPool
+
+
+def shutdownRenderPool():
+    global _renderPool
+    if _renderPool is not None:
+        _renderPool.shutdown(cancel_futures=True)
+        _renderPool = None
+
+atexit.register(shutdownRenderPool)
+
+
+def qrStyleFor(embbed_logo: bool) -> dict:
+    """Style parameters identifying a rendered QR code besides its URL, the error correction is raised when the logo is stamped over it."""
+    return { **QR_STYLE, "error_correction": qrErrorCorrection(embbed_logo) }
+
+
+def renderQRCodes(urls: list[str], options: RenderOptions, size: float | None = None, embbed_logo: bool = False) -> Iterator[Image.Image | QRStencil] | Iterator[list[list[bool]]]:
+    """QR codes of `urls` ready for `drawQRCode`, printed `size` points wide: module matrices in vector mode, images otherwise. 
+    Never contain the logo, `drawQRCode` stamps it from a shared form, `embbed_logo` raises their error correction (see 
+    `qrErrorCorrection`). Repeated URLs are only rendered once, see `_shareDuplicates`."""
+    uniqueUrls = list(dict.fromkeys(urls))                  # first occurrences, in order
+    options.instrumentation.count("qr.shared", len(urls) - len(uniqueUrls))
+    if options.vector:
+        options.instrumentation.count("qr.encoded", len(uniqueUrls))
+        qrCodes = _mapInPool(getQRMatrixFromUrl, uniqueUrls, (qrErrorCorrection(embbed_logo),), options)
+    else:
+        qrCodes = renderQRImages(uniqueUrls, embbed_logo, options, size)
+    return qrCodes if len(uniqueUrls) == len(urls) else _shareDuplicates(urls, qrCodes)
+
+
+def _shareDuplicates(urls: list[str], qrCodes: Iterator) -> Iterator:
+    """
+    Yield the QR code of every url of `urls` from `qrCodes`, the QR codes of its distinct urls in order of first occurrence. 
+    Every occurrence of a url gets the same object, kept only until its last occurrence, memory stays bounded by the urls 
+    seen but not done with rather than by their number.
+    """
+    remaining = Counter(urls)
+    kept: dict[str, object] = {}
+    for url in urls:
+        qrCode = kept[url] if url in kept else next(qrCodes)
+        remaining[url] -= 1
+        if remaining[url]:
+            kept[url] = qrCode
         else:
-            x = xStart
-        
-        if count == 12:
-            c.showPage()
-            x, y = xStart, yStart
-            count = 0
+            kept.pop(url, None)
+        yield qrCode
+
+
+def renderQRImages(urls: list[str], embbed_logo: bool, options: RenderOptions, size: float | None = None) -> Iterator[Image.Image | QRStencil]:
+    """
+    Rasterize the QR codes of `urls` using `options.workers` processes. Images are yielded in the order of `urls` as soon as 
+    they're ready, so the PDF can be written while the remaining QR codes are still being rendered. If `options.dpi` and the 
+    printed `size` are set, QR codes are 1 bit stencils at print resolution (see `getQRStencilFromUrl`), RGB images otherwise,
+    at the error correction of `qrErrorCorrection(embbed_logo)`. If `options.cache` is set, cached QR codes are loaded instead
+    of rendered and newly rendered ones are added to it.
+    """
+    errorCorrection, style = qrErrorCorrection(embbed_logo), qrStyleFor(embbed_logo)
+    if options.dpi and size:
+        render, args = getQRStencilFromUrl, (size, options.dpi, errorCorrection)
+        style = { **style, "stencil": [round(size, 2), options.dpi] }
+    else:
+        render, args = getQRImageFromUrl, (errorCorrection,)
     
-    progressBar.progressBar.setValue(100)
+    if options.cache is None:
+        options.instrumentation.count("qr.rendered", len(urls))
+        return _mapInPool(render, urls, args, options)
     
-    c.save()
-        
-
-def getQRImageReaderFromRow(url: str, embbed_logo: bool = False) -> ImageReader:
-    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_L)
-    qr.add_data(url)
+    cache = options.cache
+    keys = [cache.key(url, style) for url in urls]
+    missing = [i for i, key in enumerate(keys) if not cache.contains(key)]
+    options.instrumentation.count("qr.rendered", len(missing))
+    options.instrumentation.count("qr.cached", len(urls) - len(missing))
+    rendered = _mapInPool(render, [urls[i] for i in missing], args, options)     # only cache misses go to the workers
     
-    qr_code: Image.Image = qr.make_image(
-        image_factory=StyledPilImage, 
-        module_drawer=RoundedModuleDrawer(),
-        eye_drawer=RoundedModuleDrawer(),
-        color_mask=SolidFillColorMask(back_color=(255, 255, 255), front_color=(1, 158, 227))
-    ).get_image()
+    def merge() -> Iterator[Image.Image | QRStencil]:
+        missingSet = set(missing)
+        for i, (url, key) in enumerate(zip(urls, keys)):
+            if i in missingSet:
+                image = next(rendered)
+                cache.misses += 1
+                cache.put(key, image)
+            else:
+                image = cache.get(key)
+                if image is None:                   # entry evicted since the lookup above, render it here
+                    image = render(url, *args)
+                    cache.put(key, image)
+            yield image
     
-    if embbed_logo:
-        qr_width, qr_height = qr_code.size
-        pos = ( (qr_width - LOGO_WIDTH) // 2, (qr_height - LOGO_HEIGHT) // 2 )
-        
-        qr_code.paste(LOGO, pos, LOGO)
+    return merge()
+
+
+def _mapInPool(func: Callable, urls: list[str], args: tuple, options: RenderOptions) -> Iterator:
+    """Lazily yield `func(url, *args)` in order. Small batches are rendered in the calling process, where starting workers would cost more than it saves."""
+    workers = min(options.workers, len(urls) // MIN_ROWS_PER_WORKER)
+    if workers <= 1:
+        return (func(url, *args) for url in urls)
     
-    return ImageReader(qr_code)
+    chunksize = max(1, min(MAX_CHUNK_SIZE, len(urls) // (4 * workers)))    # a few chunks per worker balances the load without flooding the pipes
+    return _boundedMap(getRenderPool(options.workers), func, urls, args, chunksize, CHUNKS_AHEAD_PER_WORKER * options.workers)
+
 
+def _renderChunk(func: Callable, urls: list[str], args: tuple) -> list:
+    return [func(url, *args) for url in urls]
 
-def getOptimalWrapWidthForText(text: str, max_lines: int = 2):
+
+def _boundedMap(pool: ProcessPoolExecutor, func: Callable, urls: list[str], args: tuple, chunksize: int, window: int) -> Iterator:
     """
-    Retrieve the smallest largest text width such as no [...] placeholder
-    is inserted in the text wrap. 
+    Same results as `pool.map(func, urls, ...)`, but `Executor.map` submits every chunk upfront and keeps every result until it 
+    is consumed. Here at most `window` chunks are queued or done ahead of the consumer, a new one is submitted each time one 
+    is consumed, so the QR codes held in memory don't depend on the number of `urls`.
     """
-    width = len("[...]")
-    while True:
-        wLines = textwrap.wrap(text, width=width, max_lines=max_lines)
-        if wLines[-1].find("[...]") == -1:
-            return width
-        else:
-            width += 1
+    chunks = (urls[i:i + chunksize] for i in range(0, len(urls), chunksize))
+    pending = deque(pool.submit(_renderChunk, func, chunk, args) for chunk in islice(chunks, window))
+    try:
+        while pending:
+            results = pending.popleft().result()
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(_renderChunk, func, chunk, args))
+            yield from results
+    finally:                                        # abandoned (cancelled generation, error), don't render the rest
+        for future in pending:
+            future.cancel()
 
 
-def drawText(c: canvas.Canvas, row: pd.Series, x: float, yText: float, is_eq_csv: bool, qrCaption: str, maxTextWidth: float, maxFontSize: float, max_lines: int):
+def drawText(c: canvas.Canvas, infoLine: str, x: float, yText: float, qrCaption: str, maxTextWidth: float, maxFontSize: float, max_lines: int):
     """
     Draw provided text `qrCaption` centered at position x starting at height `yText`. `qrCaption` will be wrapped to a max of `max_lines` and it's 
-    font size will be computed such as the longest wrapped line doesn't exceed `maxTextWidth` and is of maximum font size `maxFontSize`. `row` will 
-    be used to write either **row[Modèle] row[Code matériel]** as last line or **Salle de Réunion row[Numéro de Signalétique] row[Localisation]**
-    depending on `is_eq_csv`.
+    font size will be computed such as the longest wrapped line doesn't exceed `maxTextWidth` and is of maximum font size `maxFontSize`. `infoLine` 
+    (see `buildInfoLines`) is written in bold as last line.
     """  
-    wLines: list[str] = textwrap.wrap(qrCaption, width=getOptimalWrapWidthForText(qrCaption, max_lines=max_lines), max_lines=max_lines)   # wrap lines to max_lines
-    wLines.append(
-        f"{row["Modèle"]} {row["Code matériel"]}" if is_eq_csv else 
-        f"Salle de Réunion {row["Numéro de Signalétique"]} {row["Localisation"]}"
-    )
+    wLines: list[str] = [*wrapCaption(qrCaption, max_lines), infoLine]     # caption wrapped to max_lines once per run
     
-    line_lengths = [len(line) for line in wLines]
-    idx = line_lengths.index(max(line_lengths))         # get index of longest line
+    idx = max(range(len(wLines)), key=lambda i: len(wLines[i]))           # get index of longest line
     
-    fontSize = fit_text_to_width(wLines[idx], "NettoVDR", max_width=maxTextWidth, max_font_size=maxFontSize)    # get appropriate fontsize to fit the longest line
+    fontSize = fit_text_to_width(wLines[idx], "NettoVDR", max_width=maxTextWidth, max_font_size=maxFontSize)    # get appropriate fontsize to fit the longest line, cached
     
-    c.setFont("NettoVDR", fontSize)   
+    def drawCaption(form: canvas.Canvas):               # caption is constant for the whole run, only stored once per font size
+        form.setFont("NettoVDR", fontSize)
+        for i, line in enumerate(wLines[:-1]):
+            form.drawCentredString(0, -i * fontSize, line)
     
-    for line in wLines[:-1]:
-        c.drawCentredString(x, yText, line)
-        yText -= fontSize
+    captionKey = hashlib.sha1(f"{qrCaption}|{max_lines}|{fontSize}".encode("utf-8")).hexdigest()[:16]
+    stampForm(c, "caption" + captionKey, x, yText, drawCaption)
+    yText -= (len(wLines) - 1) * fontSize
     
     c.setFont("NettoBold", fontSize)
     c.drawCentredString(x, yText, wLines[-1])           # draw equipment or meeting room info in bold.
@@ -253,33 +660,3 @@ def split_string_at_middle(text: str) -> list[str]:
         return [lhalf, rhalf]
     else:
         return [lhalf + "-", rhalf]
-
-
-def updateProgressBar(index: int, entries: pd.DataFrame, url: str, progressBar: ProgressBarState):
-    value = round(100 * cast(int, index) / entries.shape[0])
-    progressBar.label.setText(url)
-    progressBar.progressBar.setValue(value)
-    QCoreApplication.processEvents()                # keep ui responsive by processing events
-    
-
-def fit_text_to_width(text, font_name="Helvetica", max_width: float=200, max_font_size: float=20, min_font_size=4):
-    """
-    Find the largest font size such that `text` fits in `max_width`.
-
-    Args:
-        text (str): The text to fit.
-        font_name (str): The ReportLab font name.
-        max_width (float): Maximum allowed width (in points).
-        max_font_size (float): Upper bound of font size search.
-        min_font_size (float): Lower bound of font size search.
-
-    Returns:
-        float: The best font size fitting in max_width.
-    """
-    font_size = max_font_size
-    while font_size >= min_font_size:
-        text_width = stringWidth(text, font_name, font_size)
-        if text_width <= max_width:
-            return float(font_size)
-        font_size -= 0.5  # decrease gradually (can also use binary search for speed)
-    return float(min_font_size)
\ No newline at end of file
@@ -0,0 +1,31 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Progress notifications of the generation, dependency free so that the GUI  #
+# can subclass them without importing the generation stack at start up.      #
+##############################################################################
+
+
+class ProgressCallback:     # pluggable progress interface, generators never talk to a GUI toolkit directly.
+    """
+    Receives progress notifications from the PDF generators. The default implementation ignores them, subclass it to 
+    display progress (Qt progress bar in main.py, console output in cli.py...).
+    """
+    def start(self, total: int):
+        """Called once before the first row of a PDF is processed, `total` is the number of rows of the PDF."""
+        pass
+    
+    def advance(self, index: int, total: int, url: str):
+        """Called before row number `index` (0 based) out of `total` is drawn, `url` is the URL encoded in its QR code."""
+        pass
+    
+    def finish(self):
+        """Called once the PDF has been fully generated."""
+        pass
+
+    def pdfWritten(self, path: str):
+        """Called as soon as the PDF (or shard of a PDF) at `path` is complete and can be printed."""
+        pass
+
+
+class GenerationCancelled(Exception):        # raised by a ProgressCallback to stop the generation between two rows.
+    pass
@@ -0,0 +1,175 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Persistent content-addressed cache of rendered QR code images, with size   #
+# bounded least recently used eviction, and its in memory counterpart.       #
+##############################################################################
+import io
+import os
+import json
+import hashlib
+from PIL import Image
+from collections import OrderedDict
+from qrraster import QRStencil, STENCIL_MODULES_KEY
+
+
+CACHE_FORMAT_VERSION = 3        # bump when the rendering changes in a way that isn't captured by the style parameters.
+
+
+class QRImageCache:
+    """
+    On disk cache of rendered QR codes. Entries are PNG files named after the sha256 of the encoded URL and of every style
+    parameter used to render it, so a changed colour, drawer or logo can never return a stale image. Hits refresh the file
+    modification time, which is what eviction uses to drop the least recently used entries once `maxBytes` is exceeded.
+    Stencils (`QRStencil`) are stored as their own PNG and loaded without being decoded.
+    """
+    def __init__(self, directory: str, maxBytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.sizeBytes = sum(size for _, _, size in self._entries())    # current size of the cache, kept up to date by put/evict.
+
+    def key(self, url: str, style: dict) -> str:
+        """Content address of the QR code encoding `url` rendered with the `style` parameters (must be JSON serializable)."""
+        payload = json.dumps({ "version": CACHE_FORMAT_VERSION, "url": url, "style": style }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".png")     # two level layout keeps directories small
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Image.Image | QRStencil | None:
+        """Return the cached image or stencil of `key` or None, counting the lookup as a hit or a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            with Image.open(io.BytesIO(data)) as image:     # only the header and the text chunks are read
+                if STENCIL_MODULES_KEY in image.info:
+                    image = QRStencil(data)
+                else:
+                    image.load()
+            os.utime(path)                          # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except OSError:                             # truncated or corrupt (e.g. disk full while writing): drop it, treat as a miss
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return image
+
+    def put(self, key: str, image: Image.Image | QRStencil):
+        """Store `image` under `key`, then evict least recently used entries if the cache grew past `maxBytes`."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmpPath = f"{path}.{os.getpid()}.tmp"       # write then rename, concurrent readers never see a partial file
+        if isinstance(image, QRStencil):
+            with open(tmpPath, "wb") as file:
+                file.write(image.png)
+        else:
+            image.save(tmpPath, "PNG", compress_level=1)
+        try:
+            previousSize = os.path.getsize(path)    # overwritten entry, its size is replaced rather than added to
+        except FileNotFoundError:
+            previousSize = 0
+        os.replace(tmpPath, path)
+
+        self.sizeBytes += os.path.getsize(path) - previousSize
+        if self.sizeBytes > self.maxBytes:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache is back to 90% of `maxBytes`, avoids evicting on every put."""
+        target = 0.9 * self.maxBytes
+        for mtime, path, size in sorted(self._entries()):
+            if self.sizeBytes <= target:
+                break
+            self._remove(path, size)
+            self.evictions += 1
+
+    def _remove(self, path: str, size: int | None = None):
+        """Delete the entry at `path` of `size` bytes (stat'ed if None) and take it out of `sizeBytes`, even if a concurrent run already deleted it."""
+        try:
+            if size is None:
+                size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            if size is None:                        # never stat'ed, so never counted by this process
+                return
+        self.sizeBytes -= size
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        """(modification time, path, size) of every cached image."""
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        hitRate = 100 * self.hits / lookups if lookups else 0.0
+        return (f"Cache QR : {self.hits} hits, {self.misses} misses ({hitRate:.1f}% hits), {self.evictions} évictions, "
+                f"{self.sizeBytes / (1024 * 1024):.1f} / {self.maxBytes / (1024 * 1024):.0f} Mo")
+
+
+class MemoryQRImageCache:
+    """
+    In memory counterpart of `QRImageCache` for long running processes (see server.py): same keys and interface, images are kept
+    decoded (stencils compressed) in least recently used order and evicted as soon as their data exceeds `maxBytes`. Not shared
+    between processes.
+    """
+    key = QRImageCache.key
+
+    def __init__(self, maxBytes: int = 128 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        self.hits, self.misses, self.evictions = 0, 0, 0
+        self.images: OrderedDict[str, Image.Image | QRStencil] = OrderedDict()     # least recently used first
+        self.sizeBytes = 0
+
+    @staticmethod
+    def _imageBytes(image: Image.Image | QRStencil) -> int:
+        if isinstance(image, QRStencil):
+            return len(image.png) + len(image.stream)
+        bits = 1 if image.mode == "1" else 8 * len(image.getbands())
+        return (image.width * bits + 7) // 8 * image.height
+
+    def contains(self, key: str) -> bool:
+        return key in self.images
+
+    def get(self, key: str) -> Image.Image | QRStencil | None:
+        image = self.images.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self.images.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, key: str, image: Image.Image | QRStencil):
+        previous = self.images.pop(key, None)
+        if previous is not None:
+            self.sizeBytes -= self._imageBytes(previous)
+        self.images[key] = image
+        self.sizeBytes += self._imageBytes(image)
+        while self.sizeBytes > self.maxBytes and len(self.images) > 1:
+            _, evicted = self.images.popitem(last=False)
+            self.sizeBytes -= self._imageBytes(evicted)
+            self.evictions += 1
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        hitRate = 100 * self.hits / lookups if lookups else 0.0
+        return (f"Cache QR en mémoire : {len(self.images)} images, {self.hits} hits, {self.misses} misses ({hitRate:.1f}% hits), "
+                f"{self.evictions} évictions, {self.sizeBytes / (1024 * 1024):.1f} / {self.maxBytes / (1024 * 1024):.0f} Mo")
@@ -0,0 +1,172 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Array based rasterizer of rounded QR codes, pixel identical to qrcode's    #
+# StyledPilImage + RoundedModuleDrawer + SolidFillColorMask, or 1 bit        #
+# stencils ready to be embedded in PDFs.                                     #
+##############################################################################
+import io
+import zlib
+import struct
+import hashlib
+import numpy as np
+import qrcode
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+from functools import lru_cache
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles.colormasks import SolidFillColorMask
+from qrcode.image.styles.moduledrawers.pil import RoundedModuleDrawer
+
+
+WHITE, SQUARE, NW, NE, SE, SW = range(6)    # tiles of a quarter of a module
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+STENCIL_MODULES_KEY = "modules"             # text chunk of the PNG of a `QRStencil`, also tells stencils from images in the caches
+STENCIL_DPI_KEY = "dpi"                     # text chunk of the PNG of a `QRStencil`, resolution it was rasterized for
+STENCIL_STREAM_CHUNK = b"pdFL"              # private ancillary PNG chunk holding the PDF stream of a `QRStencil`, skipped by viewers
+
+
+@lru_cache(maxsize=None)
+def _tiles(boxSize: int, backColor: tuple, frontColor: tuple) -> np.ndarray:
+    """
+    The 6 quarter module tiles (boxSize / 2 pixels wide), already coloured: back colour, front colour and the 4 antialiased
+    rounded corners. Taken from the sprites of a `RoundedModuleDrawer` after `SolidFillColorMask` was applied to them, the mask
+    only depends on the colour of a pixel, so colouring the tiles once is the same as colouring every rendered image.
+    """
+    qr = qrcode.QRCode(box_size=boxSize, border=0)
+    qr.add_data("")
+    colorMask = SolidFillColorMask(back_color=backColor, front_color=frontColor)
+    drawer = qr.make_image(image_factory=StyledPilImage, module_drawer=RoundedModuleDrawer(), eye_drawer=RoundedModuleDrawer(),
+                           color_mask=colorMask).module_drawer
+
+    width = drawer.corner_width
+    sprites = [Image.new(drawer.SQUARE.mode, (width, width), backColor), drawer.SQUARE, drawer.NW_ROUND, drawer.NE_ROUND, drawer.SE_ROUND, drawer.SW_ROUND]
+    tiles = []
+    for sprite in sprites:
+        sprite = sprite.copy()
+        colorMask.apply_mask(sprite)
+        tiles.append(np.asarray(sprite))
+    return np.stack(tiles)
+
+
+def _quarters(matrix: list[list[bool]]) -> np.ndarray:
+    """Tile of every quarter of module of `matrix`, (2n, 2n) array of WHITE, SQUARE, NW, NE, SE or SW."""
+    dark = np.asarray(matrix, dtype=bool)
+    n = dark.shape[0]
+    padded = np.pad(dark, 1)
+    north, south, west, east = padded[:-2, 1:-1], padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:]
+
+    def quarter(corner: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.where(dark, np.where(a | b, SQUARE, corner), WHITE).astype(np.uint8)
+
+    quarters = np.empty((n, 2, n, 2), dtype=np.uint8)       # (row, top/bottom half, column, left/right half)
+    quarters[:, 0, :, 0] = quarter(NW, north, west)
+    quarters[:, 0, :, 1] = quarter(NE, north, east)
+    quarters[:, 1, :, 1] = quarter(SE, south, east)
+    quarters[:, 1, :, 0] = quarter(SW, south, west)
+    return quarters.reshape(2 * n, 2 * n)
+
+
+def _assemble(quarters: np.ndarray, tiles: np.ndarray, boxSize: int) -> np.ndarray:
+    """Pixels of the QR code, (n * boxSize, n * boxSize, ...) array of the `tiles` of every quarter of module."""
+    n, half, pixel = quarters.shape[0] // 2, tiles.shape[1], tiles.shape[3:]
+    blocks = tiles[quarters]                                # (2n, 2n, half, half, ...)
+    blocks = blocks.reshape(n, 2, n, 2, half, half, *pixel).transpose(0, 1, 4, 2, 3, 5, *range(6, 6 + len(pixel)))
+    blocks = blocks.reshape(n, 2 * half, n, 2 * half, *pixel)
+    if 2 * half == boxSize:
+        pixels = blocks
+    else:                                                   # odd box size, the drawer leaves the last row and column of a module blank
+        pixels = np.empty((n, boxSize, n, boxSize, *pixel), dtype=tiles.dtype)
+        pixels[...] = tiles[WHITE, 0, 0]
+        pixels[:, :2 * half, :, :2 * half] = blocks
+    return np.ascontiguousarray(pixels.reshape(n * boxSize, n * boxSize, *pixel))
+
+
+def renderRoundedQR(matrix: list[list[bool]], boxSize: int, backColor: tuple, frontColor: tuple) -> Image.Image:
+    """
+    Image of the QR code `matrix` (border included, see `QRCode.get_matrix`), `boxSize` pixels per module, dark modules in
+    `frontColor` with the look of `RoundedModuleDrawer`: every quarter of a dark module is a rounded corner when its two
+    adjacent neighbours are light, a square otherwise. The tile of every quarter is chosen with neighbour masks over the whole
+    matrix, then the image is assembled with a single indexing of the tiles.
+    """
+    return Image.fromarray(_assemble(_quarters(matrix), _tiles(boxSize, backColor, frontColor), boxSize))
+
+
+def renderRoundedQRMask(matrix: list[list[bool]], boxSize: int) -> Image.Image:
+    """
+    1 bit image ("1" mode, dark pixels 0) of the QR code `matrix`, same shapes as `renderRoundedQR` without antialiasing: a
+    pixel is dark when the antialiased one is at least half dark. Meant to be printed at about one pixel per device pixel.
+    Odd box sizes are rendered twice as large then halved, a pixel being dark when at least 2 of its 4 pixels are: the blank 
+    last row and column the drawer leaves in every module would be a grid of light lines across the dark areas.
+    """
+    if boxSize % 2 == 1:
+        light = _assemble(_quarters(matrix), _tiles(2 * boxSize, (255, 255, 255), (0, 0, 0))[..., 0] >= 128, 2 * boxSize)
+        half = light.shape[0] // 2
+        return Image.fromarray(light.reshape(half, 2, half, 2).sum(axis=(1, 3)) >= 3)
+    light = _tiles(boxSize, (255, 255, 255), (0, 0, 0))[..., 0] >= 128
+    return Image.fromarray(_assemble(_quarters(matrix), light, boxSize))
+
+
+class QRStencil:
+    """
+    1 bit QR code (see `renderRoundedQRMask`) ready to be embedded in a PDF as an image mask (see `pdf.drawQRStencil`), kept as
+    the PNG it is cached as, with its FlateDecode compressed rows of bits in a `STENCIL_STREAM_CHUNK` chunk (PDF viewers don't
+    all apply PNG predictors to image masks, the IDAT data can't be embedded as is). It is compressed and hashed once, where it
+    is rendered (a render worker), loading it from a cache or drawing it only slices its chunks. A pixel is a device pixel at
+    `dpi`, the stencil is drawn `width * 72 / dpi` points wide.
+    """
+    def __init__(self, png: bytes):
+        self.png = png
+        self.width, self.height, self.modules, self.dpi, self.stream = _readStencilPNG(png)
+        self.name = hashlib.sha1(self.stream).hexdigest()      # identical QR codes are stored once per PDF
+
+    @classmethod
+    def fromMask(cls, mask: Image.Image, modules: int, dpi: int) -> "QRStencil":
+        """Stencil of the 1 bit `mask` of a QR code of `modules` modules per side (border included) rasterized at `dpi`, stored in the PNG."""
+        info = PngInfo()
+        info.add_text(STENCIL_MODULES_KEY, str(modules))
+        info.add_text(STENCIL_DPI_KEY, str(dpi))
+        info.add(STENCIL_STREAM_CHUNK, zlib.compress(mask.tobytes()))
+        buffer = io.BytesIO()
+        mask.save(buffer, "PNG", pnginfo=info, dpi=(dpi, dpi))
+        return cls(buffer.getvalue())
+
+    @property
+    def points(self) -> float:
+        """Printed width in points, one pixel per device pixel."""
+        return self.width * 72 / self.dpi
+
+    def image(self) -> Image.Image:
+        """Decoded 1 bit image, for inspection: drawing a stencil never decodes it."""
+        with Image.open(io.BytesIO(self.png)) as image:
+            image.load()
+        return image
+
+
+def _readStencilPNG(png: bytes) -> tuple[int, int, int, int, bytes]:
+    """Width, height, modules per side, dpi and PDF stream of a PNG written by `QRStencil.fromMask`. Throws OSError if it isn't one."""
+    if not png.startswith(PNG_SIGNATURE):
+        raise OSError("not a PNG file")
+    width = height = stream = None
+    texts: dict[bytes, bytes] = {}
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(png):
+        length, kind = struct.unpack(">I4s", png[pos:pos + 8])
+        data = png[pos + 8:pos + 8 + length]
+        if len(data) < length:
+            break
+        if kind == b"IHDR":
+            width, height, depth, colorType, _, _, interlace = struct.unpack(">IIBBBBB", data)
+            if (depth, colorType, interlace) != (1, 0, 0):
+                raise OSError("not a 1 bit grayscale PNG")
+        elif kind == b"tEXt":
+            key, _, value = data.partition(b"\0")
+            texts[key] = value
+        elif kind == STENCIL_STREAM_CHUNK:
+            stream = data
+        elif kind == b"IEND":
+            modules, dpi = texts.get(STENCIL_MODULES_KEY.encode("latin-1")), texts.get(STENCIL_DPI_KEY.encode("latin-1"))
+            if width is None or modules is None or dpi is None or stream is None:
+                raise OSError("not a QR stencil PNG")
+            return width, height, int(modules), int(dpi), stream
+        pos += 12 + length                          # length, type, data, crc
+    raise OSError("truncated PNG file")
@@ -0,0 +1,305 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Local HTTP render service: stickers of a JSON or CSV batch streamed back   #
+# as a PDF, fonts, logo, workers and rendered QR codes kept warm.            #
+##############################################################################
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import traceback
+import statistics
+import pandas as pd
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from generation import GenerationConfig, DuplicateReport, InvalidInput, EQ_MAND_COLS, ROOM_MAND_COLS, NO_ENTRIES, csv_kind, validate_entries, writeLookupTable
+from pdf import PAYLOADS, PRINT_DPI, ProgressCallback, RenderOptions, buildUrls, genPDFsWithSheetFormat, qrErrorCorrection, qrVersionCounts, registerFonts, getLogo, getRenderPool, renderQRCodes
+from qrcache import MemoryQRImageCache
+from manifest import rowKeys
+from instrumentation import Instrumentation
+from cli import DEFAULT_CAPTION
+
+
+MAX_BODY_BYTES = 32 * 1024 * 1024           # larger batches go through cli.py
+LATENCY_WINDOW = 1000                       # most recent requests the latency percentiles are computed over
+STREAM_CHUNK = 64 * 1024
+
+
+def parseBatch(body: bytes, contentType: str) -> tuple[pd.DataFrame, dict]:
+    """
+    Rows of a render request and its fields besides the rows. `body` is either a CSV (`text/csv`, ';' separated, same columns as
+    the CLI) or JSON: a list of rows, or an object `{"format": ..., "caption": ..., "payload": ..., "duplicates": ..., "rows": [...]}`,
+    every row an object keyed by the mandatory columns. The rows are returned in request order, not validated yet. Throws 
+    `InvalidInput` if the body can't be parsed.
+    """
+    if contentType.split(";")[0].strip() == "text/csv":
+        try:
+            return pd.read_csv(io.BytesIO(body), sep=";", dtype=str, keep_default_na=False, na_values=[""]), {}
+        except pd.errors.EmptyDataError:
+            raise InvalidInput(NO_ENTRIES)
+        except ValueError as err:                                   # parser and decoding errors
+            raise InvalidInput(f"CSV non valide : {err}.")
+
+    try:
+        batch = json.loads(body.decode("utf-8"))
+    except ValueError as err:
+        raise InvalidInput(f"JSON non valide : {err}.")
+    fields = batch if isinstance(batch, dict) else { "rows": batch }
+    rows = fields.get("rows")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise InvalidInput("Fournissez les lignes sous forme de liste d'objets, e.g. [{\"Modèle\": ..., \"Code matériel\": ...}].")
+    return pd.DataFrame([{ col: None if value is None else str(value) for col, value in row.items() } for row in rows],
+                        columns=sorted({ col for row in rows for col in row }), dtype=object), fields
+
+
+class ServiceMetrics:
+    """
+    Request counters, latencies of the last `LATENCY_WINDOW` requests and rendering throughput, reported by `/metrics`. `errors`
+    counts the requests refused (4xx, e.g. invalid rows), `serverErrors` the ones that failed (5xx).
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests, self.errors, self.serverErrors = 0, 0, 0
+        self.rows, self.bytesSent = 0, 0
+        self.renderSeconds = 0.0                        # time spent generating PDFs, the throughput is computed over it
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float, rows: int = 0, bytesSent: int = 0, status: int = 200):
+        with self.lock:
+            self.requests += 1
+            self.errors += 400 <= status < 500
+            self.serverErrors += status >= 500
+            self.latencies.append(seconds)
+            if status < 400:
+                self.rows += rows
+                self.bytesSent += bytesSent
+                self.renderSeconds += seconds
+
+    def report(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            rowsPerSecond = self.rows / self.renderSeconds if self.renderSeconds else 0.0
+            report = {
+                "uptimeSeconds": round(time.perf_counter() - self.started, 3), "requests": self.requests, "errors": self.errors,
+                "serverErrors": self.serverErrors, "rows": self.rows, "bytesSent": self.bytesSent, "rowsPerSecond": round(rowsPerSecond, 1)
+            }
+        if latencies:
+            percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+            report["latencyMs"] = {
+                "window": len(latencies), "mean": round(1000 * statistics.fmean(latencies), 1), "p50": round(1000 * percentile(0.5), 1),
+                "p95": round(1000 * percentile(0.95), 1), "max": round(1000 * latencies[-1], 1)
+            }
+        return report
+
+
+class RenderService:
+    """
+    State kept warm between requests: fonts and logo loaded once, render pool started once, QR codes rendered by earlier requests
+    in an in memory LRU (`MemoryQRImageCache`) and stage timers accumulated over every request. PDFs are generated one at a time,
+    the render pool is shared.
+    """
+    def __init__(self, workers: int = 1, cacheBytes: int = 128 * 1024 * 1024, vector: bool = False, dpi: int | None = PRINT_DPI):
+        self.generationConfig = GenerationConfig.default()
+        self.cache = MemoryQRImageCache(cacheBytes)
+        self.instrumentation = Instrumentation()
+        self.workers, self.vector, self.dpi = workers, vector, dpi
+        self.metrics = ServiceMetrics()
+        self.renderLock = threading.Lock()
+
+    def warmUp(self):
+        """Load what the first request would otherwise pay for: fonts, logo, worker processes and a first QR code of every format."""
+        registerFonts()
+        getLogo()
+        if self.workers > 1:
+            getRenderPool(self.workers)
+        for qrFormat in self.generationConfig.formats.values():     # not cached, counted nowhere
+            qr = qrFormat.sheetFormat.qr
+            next(renderQRCodes(["warm up"], RenderOptions(workers=1, vector=self.vector, dpi=self.dpi), qr.size, qr.embbedLogo))
+
+    def parseRequest(self, body: bytes, contentType: str, query: dict) -> tuple[dict, pd.DataFrame, bool, DuplicateReport]:
+        """
+        Fields and rows of a request, see `parseBatch`. Query parameters (`format`, `caption`, `payload`, `duplicates`) override 
+        the fields of the body. The rows are validated as the CLI does it, see `validate_entries`. Returns the fields, the 
+        validated rows, whether they are equipments and the duplicated rows. Throws `InvalidInput` if the request isn't valid.
+        """
+        csv_df, fields = parseBatch(body, contentType)
+        fields = { **fields, **{ key: values[-1] for key, values in query.items() } }
+        if csv_df.shape[0] == 0:                                    # no rows, hence no columns for JSON bodies
+            raise InvalidInput(NO_ENTRIES)
+        is_eq_csv = csv_kind(set(csv_df.columns))
+        entries, duplicates = validate_entries(csv_df, is_eq_csv, str(fields.get("duplicates", "keep")))
+        return fields, entries, is_eq_csv, duplicates
+
+    def render(self, body: bytes, contentType: str, query: dict) -> tuple[str, int, DuplicateReport]:
+        """
+        Generate the PDF of a render request in a temporary folder, see `parseRequest`. The format is a name or description of
+        `GenerationConfig`. Returns the path of the PDF, in a folder the caller removes once it is sent, the number of stickers 
+        and the duplicated rows. Throws `InvalidInput` if the request isn't valid. With the "id" payload, the lookup table of
+        the stickers is returned by `lookup`.
+        """
+        fields, entries, is_eq_csv, duplicates = self.parseRequest(body, contentType, query)
+        if "format" not in fields:
+            raise InvalidInput(f"Format de QR code manquant. Formats disponibles : {[f.name for f in self.generationConfig.formats.values()]}.")
+        qrFormat = self.generationConfig.getFormat(str(fields["format"]))
+        payload = fields.get("payload", "full")
+        if payload not in PAYLOADS:
+            raise InvalidInput(f"Contenu de QR code inconnu '{payload}'. Contenus disponibles : {PAYLOADS}.")
+        try:
+            qrVersionCounts(buildUrls(entries, payload), qrErrorCorrection(qrFormat.sheetFormat.qr.embbedLogo))
+        except Exception as err:                                    # a row too long for a QR code, refused before rendering anything
+            raise InvalidInput(str(err))
+
+        outputPath = tempfile.mkdtemp(prefix="hrc-qr-")
+        try:
+            with self.renderLock, self.instrumentation.scope(qrFormat.name, "service"):
+                paths = genPDFsWithSheetFormat(qrFormat.sheetFormat, is_eq_csv, entries, ProgressCallback(), outputPath,
+                                               str(fields.get("caption", DEFAULT_CAPTION)), self.renderOptions(payload))
+        except BaseException:
+            shutil.rmtree(outputPath, ignore_errors=True)
+            raise
+        return paths[0], entries.shape[0], duplicates
+
+    def lookup(self, body: bytes, contentType: str, query: dict) -> tuple[str, int, DuplicateReport]:
+        """
+        Write the lookup table of a render request (see `parseRequest`) in a temporary folder: the asset identifiers the
+        "id" payload encodes and the rows they stand for, see `generation.writeLookupTable`. Same return value as `render`.
+        """
+        _, entries, is_eq_csv, duplicates = self.parseRequest(body, contentType, query)
+        outputPath = tempfile.mkdtemp(prefix="hrc-qr-")
+        return writeLookupTable(entries, rowKeys(entries, is_eq_csv), outputPath), entries.shape[0], duplicates
+
+    def renderOptions(self, payload: str) -> RenderOptions:
+        return RenderOptions(workers=self.workers, cache=self.cache, vector=self.vector, instrumentation=self.instrumentation,
+                             payload=payload, dpi=self.dpi)
+
+    def status(self) -> dict:
+        """Metrics of the requests, of the QR code cache and cumulative time of every generation stage over every request."""
+        stages: dict[str, dict] = {}
+        for (_, name), (seconds, calls) in sorted(dict(self.instrumentation.timers).items()):  # copied, a render may be adding timers
+            stage = stages.setdefault(name, { "seconds": 0.0, "calls": 0 })
+            stage["seconds"] = round(stage["seconds"] + seconds, 6)
+            stage["calls"] += calls
+        return {
+            **self.metrics.report(),
+            "cache": { "images": len(self.cache.images), "hits": self.cache.hits, "misses": self.cache.misses,
+                       "evictions": self.cache.evictions, "sizeBytes": self.cache.sizeBytes, "maxBytes": self.cache.maxBytes },
+            "stages": stages
+        }
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /render: PDF of the batch in the body (see `RenderService.render`), with the number of duplicated rows in the 
+    `X-Duplicates` header, POST /lookup: lookup table of the "id" payload stickers of the same batch (`RenderService.lookup`),
+    GET /formats: available formats, GET /metrics: `RenderService.status`, GET /health. Errors are answered as JSON
+    `{"error": message}`, 400 for invalid requests (`InvalidInput`), 500 for failures of the service.
+    """
+    service: RenderService
+    quiet: bool = False
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self.sendJSON(200, { "status": "ok" })
+        elif path == "/formats":
+            self.sendJSON(200, [{ "name": f.name, "description": f.description } for f in self.service.generationConfig.formats.values()])
+        elif path == "/metrics":
+            self.sendJSON(200, self.service.status())
+        else:
+            self.sendJSON(404, { "error": f"Chemin inconnu '{path}'." })
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        routes = { "/render": (self.service.render, "application/pdf"), "/lookup": (self.service.lookup, "text/csv; charset=utf-8") }
+        if url.path not in routes:
+            self.sendJSON(404, { "error": f"Chemin inconnu '{url.path}'." })
+            return
+        handle, contentType = routes[url.path]
+
+        start = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.sendJSON(413, { "error": f"Requête trop grande ({length} octets), utilisez cli.py au delà de {MAX_BODY_BYTES} octets." })
+            self.service.metrics.record(time.perf_counter() - start, status=413)
+            return
+
+        try:
+            path, rows, duplicates = handle(self.rfile.read(length), self.headers.get("Content-Type", "application/json"), parse_qs(url.query))
+        except InvalidInput as err:
+            self.sendJSON(400, { "error": str(err) })
+            self.service.metrics.record(time.perf_counter() - start, status=400)
+            return
+        except Exception as err:                                    # a bug or a failure of the service, not of the request
+            traceback.print_exc()
+            self.sendJSON(500, { "error": f"Erreur interne : {err}" })
+            self.service.metrics.record(time.perf_counter() - start, status=500)
+            return
+
+        try:
+            size = os.path.getsize(path)
+            self.send_response(200)
+            self.send_header("Content-Type", contentType)
+            self.send_header("Content-Length", str(size))
+            self.send_header("Content-Disposition", f"attachment; filename=\"{os.path.basename(path)}\"")
+            self.send_header("X-Duplicates", f"repeated={len(duplicates.repeated)}; reused={len(duplicates.reused)}; dropped={duplicates.dropped}")
+            self.end_headers()
+            with open(path, "rb") as f:
+                while chunk := f.read(STREAM_CHUNK):
+                    self.wfile.write(chunk)
+        finally:
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        self.service.metrics.record(time.perf_counter() - start, rows, size)
+
+    def sendJSON(self, status: int, content):
+        body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def parseArgs(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Service HTTP local générant les PDFs de QR codes HRC, e.g. pour réimprimer une étiquette. "
+                                     f"POST /render?format=3424 avec des lignes JSON ou un CSV (text/csv), colonnes {EQ_MAND_COLS} ou {ROOM_MAND_COLS}, "
+                                     "POST /lookup avec le même lot pour la table des identifiants (--payload id).")
+    parser.add_argument("--host", default="127.0.0.1", help="adresse d'écoute. Défaut : 127.0.0.1, uniquement cette machine.")
+    parser.add_argument("-p", "--port", type=int, default=8765, help="port d'écoute. Défaut : 8765.")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="nombre de processus générant les QR codes des grands lots. Défaut : 1.")
+    parser.add_argument("--vector", action="store_true", help="dessine les QR codes en vectoriel (modules carrés), nets à toute échelle, PDFs les plus légers.")
+    parser.add_argument("--dpi", type=int, default=PRINT_DPI, help=f"résolution de l'imprimante, 0 pour des images RGB lissées. Défaut : {PRINT_DPI}.")
+    parser.add_argument("--cache-size", type=int, default=128, help="taille maximale du cache en mémoire des QR codes en Mo. Défaut : 128.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="n'affiche pas les requêtes.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parseArgs(argv)
+    service = RenderService(workers=max(1, args.workers), cacheBytes=args.cache_size * 1024 * 1024, vector=args.vector, dpi=args.dpi or None)
+    service.warmUp()
+
+    RenderRequestHandler.service, RenderRequestHandler.quiet = service, args.quiet
+    server = ThreadingHTTPServer((args.host, args.port), RenderRequestHandler)
+    print(f"Service prêt sur http://{args.host}:{server.server_port}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,90 @@
+##############################################################################
+# A. Freeman 17/10/2026                         swissarthurfreeman@gmail.com #
+# Cached text layout of the stickers: caption wrapping and font size fitting #
+# computed once per (text, font, width) instead of once per sticker.         #
+##############################################################################
+import textwrap
+from functools import lru_cache
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+PLACEHOLDER = "[...]"       # inserted by textwrap when the text doesn't fit in max_lines
+FONT_SIZE_STEP = 0.5        # font sizes are searched on a 0.5 pt grid
+
+
+_glyphWidths: dict[str, dict[str, float]] = {}     # font name -> character -> advance width of a 1000 pt glyph
+
+
+def textWidth(text: str, fontName: str, fontSize: float) -> float:
+    """Same result as reportlab's `stringWidth`, from a per font table of glyph widths filled as new characters are seen."""
+    widths = _glyphWidths.setdefault(fontName, {})
+    total = 0
+    for char in text:
+        width = widths.get(char)
+        if width is None:
+            width = widths[char] = stringWidth(char, fontName, 1000)
+        total += width
+    return 0.001 * fontSize * total
+
+
+def _wrapFits(text: str, width: int, max_lines: int) -> bool:
+    wLines = textwrap.wrap(text, width=width, max_lines=max_lines)
+    return bool(wLines) and wLines[-1].find(PLACEHOLDER) == -1
+
+
+@lru_cache(maxsize=256)
+def getOptimalWrapWidthForText(text: str, max_lines: int = 2) -> int:
+    """
+    Retrieve the smallest largest text width such as no [...] placeholder
+    is inserted in the text wrap. Widths narrower than the longest word break words, whether the text fits isn't monotonic 
+    there so they're tried one by one. From the longest word on, wrapping only gets shorter with the width: binary search.
+    """
+    longestWord = max((len(word) for word in text.split()), default=0)
+    for width in range(len(PLACEHOLDER), longestWord):
+        if _wrapFits(text, width, max_lines):
+            return width
+    
+    low = max(len(PLACEHOLDER), longestWord)
+    high = max(low, len(text))                          # a width of len(text) always fits on one line
+    while low < high:
+        width = (low + high) // 2
+        if _wrapFits(text, width, max_lines):
+            high = width
+        else:
+            low = width + 1
+    return low
+
+
+@lru_cache(maxsize=256)
+def wrapCaption(text: str, max_lines: int) -> tuple[str, ...]:
+    """`text` wrapped to at most `max_lines` lines as narrow as possible, computed once per run since the caption is constant."""
+    return tuple(textwrap.wrap(text, width=getOptimalWrapWidthForText(text, max_lines=max_lines), max_lines=max_lines))
+
+
+@lru_cache(maxsize=4096)
+def fit_text_to_width(text, font_name="Helvetica", max_width: float=200, max_font_size: float=20, min_font_size=4):
+    """
+    Find the largest font size such that `text` fits in `max_width`.
+
+    Args:
+        text (str): The text to fit.
+        font_name (str): The ReportLab font name.
+        max_width (float): Maximum allowed width (in points).
+        max_font_size (float): Upper bound of font size search.
+        min_font_size (float): Lower bound of font size search.
+
+    Returns:
+        float: The best font size fitting in max_width, searched by steps of 0.5 from max_font_size.
+    """
+    # binary search of the first step k such as max_font_size - k * FONT_SIZE_STEP fits, width grows with the font size.
+    low, high = 0, int((max_font_size - min_font_size) / FONT_SIZE_STEP) + 1    # high: no size fits
+    while low < high:
+        k = (low + high) // 2
+        if textWidth(text, font_name, max_font_size - k * FONT_SIZE_STEP) <= max_width:
+            high = k
+        else:
+            low = k + 1
+
+    if max_font_size - low * FONT_SIZE_STEP < min_font_size:
+        return float(min_font_size)
+    return float(max_font_size - low * FONT_SIZE_STEP)